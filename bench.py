@@ -0,0 +1,180 @@
+"""
+Benchmarks of compound recognition.
+
+Every compound type is measured separately, with names and signs as input,
+one by one with `recognize` and all at once with `recognize_bulk`.
+The corpus is generated from the tables with a fixed seed, so runs are comparable.
+
+    python bench.py                       # print results as JSON
+    python bench.py -o bench_output.txt   # save them
+    python bench.py --compare baseline.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+
+import nazvoslovi
+from nazvoslovi import COMPOUNDS, INDEX_CLASSES, NOR, enumerate_names, fix_compound_sign, load_name, recognize, recognize_bulk, table, verify_roundtrips
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def make_corpus(size: int, seed: int) -> dict:
+    """
+    Creates a corpus of `size` entries for every compound type and direction.
+    Returns a dict of `{benchmark: entries}`.
+    """
+    rnd = random.Random(seed)
+    corpus = {}
+    for compound in COMPOUNDS:
+        # salts combine two elements, so only a few of them are used to keep the generated names small
+        if compound in INDEX_CLASSES:
+            elements = sorted(table)
+        else:
+            elements = rnd.sample(sorted(table), 8)
+        names = list(enumerate_names([compound], elements))
+        rnd.shuffle(names)
+        valid = []
+        with redirect_stdout(io.StringIO()):
+            for name in names:
+                result = recognize(name)
+                if isinstance(result, nazvoslovi.BaseCompound):
+                    try:
+                        result.todict()
+                    except Exception:
+                        continue
+                    valid.append((name, result.sign))
+                if len(valid) >= size:
+                    break
+        corpus[f'recognize.{compound.__name__}.name'] = [name for name,sign in valid]
+        corpus[f'recognize.{compound.__name__}.sign'] = [sign.translate(NOR) for name,sign in valid]
+
+    alphabet = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 ().'
+    corpus['recognize.invalid'] = [
+        ''.join(rnd.choice(alphabet) for _ in range(rnd.randint(1, 20))) for _ in range(size)
+    ]
+    corpus['fix_compound_sign'] = corpus['recognize.SaltHydrate.sign']
+    corpus['load_name'] = [
+        name.split()[-1] for name in corpus['recognize.Oxid.name']
+    ]
+    return corpus
+
+def measure(function, entries: list, repeat: int) -> float:
+    """Returns the best time per entry in microseconds."""
+    best = float('inf')
+    with redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for entry in entries:
+                function(entry)
+            best = min(best, time.perf_counter()-start)
+    return best/len(entries)*1e6
+
+def measure_batch(function, entries: list, repeat: int) -> float:
+    """Returns the best time per entry in microseconds of a function taking all entries at once."""
+    best = float('inf')
+    with redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function(entries)
+            best = min(best, time.perf_counter()-start)
+    return best/len(entries)*1e6
+
+def _safe_load_name(name: str):
+    try:
+        load_name(name)
+    except nazvoslovi.NazvosloviException:
+        pass
+
+def measure_process(args: list, repeat: int) -> float:
+    """Returns the best time of running a python process in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=HERE, capture_output=True, check=True)
+        best = min(best, time.perf_counter()-start)
+    return best*1e3
+
+def run(size: int, seed: int, repeat: int) -> dict:
+    """Runs all benchmarks and returns the results."""
+    results = {}
+    for key,entries in make_corpus(size, seed).items():
+        if key.startswith('recognize'):
+            function = recognize
+        elif key == 'fix_compound_sign':
+            function = fix_compound_sign
+        else:
+            function = _safe_load_name
+        results[key] = {'us': round(measure(function, entries, repeat), 3), 'n': len(entries)}
+        if key.startswith('recognize'):
+            # the same entries solved together, compare with the scalar result above
+            results[key.replace('recognize', 'recognize_bulk', 1)] = {
+                'us': round(measure_batch(recognize_bulk, entries, repeat), 3), 'n': len(entries)
+            }
+
+    # round trips of every class with a few elements, in this process
+    elements = random.Random(seed).sample(sorted(table), 4)
+    best = min((verify_roundtrips(elements=elements, jobs=1) for _ in range(repeat)), key=lambda report: report.seconds)
+    results['verify_roundtrips'] = {'us': round(best.seconds/best.checked*1e6, 3), 'n': best.checked}
+    
+    results['process.python'] = {'ms': round(measure_process(['-c', 'pass'], repeat), 2)}
+    results['process.import'] = {'ms': round(measure_process(['-c', 'import nazvoslovi'], repeat), 2)}
+    results['process.cli'] = {'ms': round(measure_process(['main.py', 'Li2O'], repeat), 2)}
+    return {
+        'python': platform.python_version(),
+        'size': size,
+        'seed': seed,
+        'results': results,
+    }
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Returns a list of `(benchmark, baseline, current, ratio)` that got slower than `threshold`."""
+    slower = []
+    for key,result in current['results'].items():
+        if key not in baseline['results']:
+            continue
+        unit = 'us' if 'us' in result else 'ms'
+        old, new = baseline['results'][key][unit], result[unit]
+        ratio = new/old if old else 1.0
+        print(f'{key:35} {old:10.2f} -> {new:10.2f} {unit}  {ratio:5.2f}x', file=sys.stderr)
+        if ratio > 1+threshold:
+            slower.append((key, old, new, ratio))
+    return slower
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=1000, help='entries per benchmark')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5, help='the best of this many runs is used')
+    parser.add_argument('-o', '--output', help='save the results into a file')
+    parser.add_argument('--compare', help='compare with results saved earlier, exits with 1 if anything is slower, 2 if the corpus differs')
+    parser.add_argument('--threshold', type=float, default=0.1, help='allowed slowdown when comparing')
+    args = parser.parse_args()
+
+    current = run(args.size, args.seed, args.repeat)
+    output = json.dumps(current, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+        if (baseline['size'], baseline['seed']) != (current['size'], current['seed']):
+            print('baseline was made with a different corpus', file=sys.stderr)
+            sys.exit(2)
+        slower = compare(current, baseline, args.threshold)
+        for key,old,new,ratio in slower:
+            print(f'slower: {key} {ratio:.2f}x', file=sys.stderr)
+        sys.exit(1 if slower else 0)
+
+if __name__ == '__main__':
+    main()
@@ -1,24 +1,272 @@
-from nazvoslovi import BaseCompound, pprint, recognize, NazvosloviException, COMPOUNDS
+# nazvoslovi is imported in the functions, so a cached result doesn't have to load the tables
+from bisect import bisect_left
+from collections.abc import Iterable
+from itertools import islice, takewhile
+import os
+import stat
 import sys
-import json
-
-if len(sys.argv)==1:
-    entry = input('napiš sloučeninu: ')
-    do_json = False
-else:
-    if sys.argv[1] == 'help':
-        quit(print('známé sloučeniny: '+', '.join(c.typename for c in COMPOUNDS)))
-    do_json = '--json' in sys.argv
-    entry = sys.argv[1]
-
-compound = recognize(entry)
-if isinstance(compound,NazvosloviException):
-    quit(print(compound))
-
-if do_json:
-    print(json.dumps(compound.todict() if compound is BaseCompound else None))
-else:
-    if compound is None:
+
+COMMANDS = ('help', 'snapshot', 'binary', 'quiz', 'index', 'serve', 'cache', 'verify', '--stdin', '--input')
+
+def export_lines(lines: Iterable[str], path: str, jobs: int=None):
+    """
+    Recognizes every line and exports the results into a file, a blank line gets an "empty" error row.
+    Files ending with .json are exported as columns, others as csv, compressed if they end with .gz, .bz2 or .xz.
+    """
+    from nazvoslovi import recognize_many, recognize_parallel, export_results, COMPRESSIONS
+    compression = next((name for name,extension in COMPRESSIONS.items() if path.endswith(extension)), None)
+    name = path[:-len(COMPRESSIONS[compression])] if compression else path
+    results = recognize_parallel(lines, jobs) if jobs else recognize_many(lines)
+    count = export_results(results, path, 'columns' if name.endswith('.json') else 'csv', compression)
+    print(f'exportováno {count} sloučenin do {path}', file=sys.stderr)
+
+def is_stream(lines) -> bool:
+    """
+    Whether the lines come from a pipe or a terminal, so another program may be waiting for each answer.
+    Results of a regular file are only flushed when the output buffer is full.
+    """
+    try:
+        return not stat.S_ISREG(os.fstat(lines.fileno()).st_mode)
+    except (AttributeError, OSError, ValueError):
+        return False
+
+def print_json_lines(lines: Iterable[str], jobs: int=None, export: str=None):
+    """
+    Recognizes every line and prints a JSON object for each one, so the output lines match the input lines,
+    a blank line gets an "empty" error. Each line is flushed as soon as it's recognized when the lines come from a pipe.
+    With `jobs` the lines are recognized in multiple processes and the throughput is printed to stderr.
+    With `export` the results are exported into a file instead.
+    """
+    import json
+    from nazvoslovi import recognize_many, recognize_parallel, write_results, BatchStats
+    if export is not None:
+        return export_lines(lines, export, jobs)
+    if jobs is None:
+        write_results(recognize_many(lines), sys.stdout, flush=is_stream(lines))
+        return
+    
+    stats = BatchStats()
+    for result in recognize_parallel(lines, jobs, todict=True, stats=stats):
+        print(json.dumps(result, ensure_ascii=False))
+    print(f'zpracováno {stats.entries} sloučenin ({stats.errors} chyb) za {stats.seconds:.2f}s, {stats.throughput:.0f}/s', file=sys.stderr)
+
+def entry_json(entry: str) -> str:
+    """Returns the JSON of a recognized entry."""
+    import json
+    from nazvoslovi import recognize_many
+    return json.dumps(next(recognize_many([entry])).todict(), ensure_ascii=False)
+
+def print_cached_json(entry: str, directory: str=None):
+    """
+    Prints the JSON of an entry from the persistent cache in `directory`.
+    It's recognized and saved if it's not there yet, or only recognized if the cache can't be opened.
+    """
+    import sqlite3
+    from resultcache import ResultCache
+    try:
+        cache = ResultCache(directory)
+    except (OSError, sqlite3.Error):
+        return print(entry_json(entry))
+    with cache:
+        payload = cache.get(entry)
+        if payload is None:
+            payload = entry_json(entry)
+            cache.put(entry, payload)
+    print(payload)
+
+def print_compound(entry: str):
+    """Prints a table of a compound, or why it wasn't recognized."""
+    from nazvoslovi import pprint, recognize, NazvosloviException
+    compound = recognize(entry)
+    if isinstance(compound,NazvosloviException):
+        print(compound)
+    elif compound is None:
         print(f'sloučenina "{entry}" nebyla rozpoznána')
     else:
-        print('\n'+pprint(compound,entry))
+        try:
+            print('\n'+pprint(compound,entry))
+        except NazvosloviException as e:
+            print(e)
+
+REPL_COMMANDS = {
+    'help': 'vypíše známé sloučeniny a příkazy',
+    'time': 'zapne nebo vypne měření času',
+    'json': 'zapne nebo vypne výpis jako JSON',
+    'exit': 'ukončí program',
+}
+REPL_HISTORY = os.path.join(os.path.expanduser('~'), '.nazvoslovi_history')
+
+def completion_words() -> list:
+    """Returns sorted words for tab completion, made from the element and oxidation tables."""
+    from nazvoslovi import table, oxidation_table, amount_table
+    words = {'oxid', 'sulfid', 'kyselina', 'hydrogen', *REPL_COMMANDS}
+    words.update(prefix+'hydrát' for prefix in amount_table[1:])
+    for data in table.values():
+        words.add(data['sign'])
+        for row in oxidation_table.values():
+            words.update(data['naming']+suffix for suffix in row[1:])
+        words.update('hydrogen'+data['naming']+suffix for suffix in oxidation_table['salt'][1:])
+    return sorted(words)
+
+def _completer(words: list):
+    """Returns a readline completer of words starting with the typed text."""
+    matches = []
+    def complete(text: str, state: int):
+        if state == 0:
+            start = bisect_left(words, text)
+            matches[:] = takewhile(lambda word: word.startswith(text), islice(words, start, None))
+        return matches[state] if state < len(matches) else None
+    return complete
+
+def repl():
+    """
+    Recognizes compounds typed one by one until the input ends, the tables stay loaded in between.
+    Has history and tab completion if readline is available.
+    """
+    import json
+    import time
+    from nazvoslovi import recognize_many, COMPOUNDS
+    try:
+        import readline
+    except ImportError:
+        readline = None
+    
+    if readline is not None:
+        readline.set_completer(_completer(completion_words()))
+        readline.set_completer_delims(' ')
+        if 'libedit' in (readline.__doc__ or ''):
+            readline.parse_and_bind('bind ^I rl_complete')
+        else:
+            readline.parse_and_bind('tab: complete')
+        readline.set_history_length(1000)
+        try:
+            readline.read_history_file(REPL_HISTORY)
+        except OSError:
+            pass
+    
+    print('napiš sloučeninu, "help" vypíše příkazy')
+    timing = do_json = False
+    try:
+        while True:
+            try:
+                entry = input('> ').strip()
+            except (EOFError, KeyboardInterrupt):
+                print()
+                break
+            if not entry:
+                continue
+            if entry in ('exit', 'quit'):
+                break
+            if entry == 'help':
+                print('známé sloučeniny: '+', '.join(c.typename for c in COMPOUNDS))
+                for command,description in REPL_COMMANDS.items():
+                    print(f'  {command:6} {description}')
+                continue
+            if entry == 'time':
+                timing = not timing
+                print('měření času '+('zapnuto' if timing else 'vypnuto'))
+                continue
+            if entry == 'json':
+                do_json = not do_json
+                print('výpis jako JSON '+('zapnut' if do_json else 'vypnut'))
+                continue
+            
+            start = time.perf_counter()
+            if do_json:
+                print(json.dumps(next(recognize_many([entry])).todict(), ensure_ascii=False))
+            else:
+                print_compound(entry)
+            if timing:
+                print(f'({(time.perf_counter()-start)*1e3:.3f} ms)')
+    finally:
+        if readline is not None:
+            try:
+                readline.write_history_file(REPL_HISTORY)
+            except OSError:
+                pass
+
+def main():
+    jobs = None
+    if '--jobs' in sys.argv:
+        i = sys.argv.index('--jobs')
+        if i+1 >= len(sys.argv) or not sys.argv[i+1].isdigit():
+            quit(print('použití: python main.py --stdin|--input <soubor> --jobs <počet procesů>'))
+        jobs = int(sys.argv[i+1])
+        del sys.argv[i:i+2]
+    export = None
+    if '--export' in sys.argv:
+        i = sys.argv.index('--export')
+        if i+1 >= len(sys.argv):
+            quit(print('použití: python main.py --stdin|--input <soubor> --export <soubor.csv|soubor.json>[.gz|.bz2|.xz]'))
+        export = sys.argv[i+1]
+        del sys.argv[i:i+2]
+    cache = os.environ.get('NAZVOSLOVI_CACHE')
+    if '--cache' in sys.argv:
+        i = sys.argv.index('--cache')
+        if i+1 >= len(sys.argv):
+            quit(print('použití: python main.py <sloučenina> --json --cache <složka>'))
+        cache = sys.argv[i+1]
+        del sys.argv[i:i+2]
+    
+    if len(sys.argv) > 1 and sys.argv[1] == 'cache':
+        from resultcache import ResultCache
+        with ResultCache(cache) as results:
+            if sys.argv[2:] == ['clear']:
+                results.clear()
+                quit(print('cache vymazána'))
+            quit(print(f'{len(results)} výsledků v {results.path}'))
+    if cache and len(sys.argv) == 3 and sys.argv[2] == '--json' and sys.argv[1] not in COMMANDS:
+        quit(print_cached_json(sys.argv[1], cache))
+    
+    from nazvoslovi import build_snapshot, build_binary_table, verify_roundtrips, CompoundGenerator, CompoundIndex, COMPOUNDS, VERIFY_PARTNERS
+    
+    if len(sys.argv)==1:
+        quit(repl())
+    else:
+        if sys.argv[1] == 'help':
+            quit(print('známé sloučeniny: '+', '.join(c.typename for c in COMPOUNDS)))
+        if sys.argv[1] == 'snapshot':
+            quit(print('tabulky uloženy do '+build_snapshot()))
+        if sys.argv[1] == 'binary':
+            quit(print('tabulka prvků uložena do '+build_binary_table()+', použije se s NAZVOSLOVI_BINARY=1'))
+        if sys.argv[1] == 'quiz':
+            if len(sys.argv) < 3 or not all(arg.isdigit() for arg in sys.argv[2:4]):
+                quit(print('použití: python main.py quiz <počet> [<seed>]'))
+            seed = int(sys.argv[3]) if len(sys.argv) > 3 else None
+            for item in CompoundGenerator(seed).quiz(int(sys.argv[2])):
+                print(item.question+'\t'+item.answer)
+            quit()
+        if sys.argv[1] == 'index':
+            index = CompoundIndex.build()
+            index.save()
+            quit(print(f'uloženo {len(index)} záznamů do indexu'))
+        if sys.argv[1] == 'verify':
+            if not set(sys.argv[2:]) <= {'--all'}:
+                quit(print('použití: python main.py verify [--all] [--jobs <počet procesů>]'))
+            everything = '--all' in sys.argv
+            report = verify_roundtrips(jobs=jobs, partners=None if everything else VERIFY_PARTNERS, every_prefix=everything)
+            if report.mismatches:
+                print(report.format())
+            kinds = ', '.join(f'{kind} {count}' for kind,count in report.by_kind().items())
+            print(f'ověřeno {report.checked} sloučenin ({report.mismatches} neshod: {kinds}) za {report.seconds:.2f}s, {report.throughput:.0f}/s', file=sys.stderr)
+            sys.exit(1 if report.mismatches else 0)
+        if sys.argv[1] == 'serve':
+            # imported here so the asyncio import doesn't slow down the other commands
+            import server
+            quit(server.main(sys.argv[2:]))
+        if sys.argv[1] == '--stdin':
+            quit(print_json_lines(sys.stdin, jobs, export))
+        if sys.argv[1] == '--input':
+            if len(sys.argv) < 3:
+                quit(print('použití: python main.py --input <soubor>'))
+            with open(sys.argv[2], 'r', encoding='utf-8') as file:
+                quit(print_json_lines(file, jobs, export))
+        do_json = '--json' in sys.argv
+        entry = sys.argv[1]
+    
+    if do_json:
+        quit(print(entry_json(entry)))
+    print_compound(entry)
+
+if __name__ == '__main__':
+    main()
@@ -5,9 +5,18 @@ Since czech is very... unique,  this was more complicated than expected.
 I can't be bothered to make czech comments, I just kept english ones.
 People who speak english will be reading this anyway, so it doesn't matter.
 """
+import marshal
+import mmap
+import os
 import re
-from typing import List, Optional, Set, Tuple, Union
+import struct
+import time
+from collections import OrderedDict, deque
+from functools import lru_cache
+from itertools import chain, islice
+from typing import Iterable, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Set, Tuple, Type, Union
 from math import gcd
+from types import MappingProxyType
 
 # constants for detection and formatting of compounds
 SUB = str.maketrans("0123456789", "₀₁₂₃₄₅₆₇₈₉")
@@ -17,32 +26,365 @@ NOR = str.maketrans("₀₁₂₃₄₅₆₇₈₉", "0123456789")
 RE_SIGN = r"^(\(?[A-Z][a-z]?\d{0,2} ?\)?)*$"
 RE_NAME = r"^[^0-9]*$"
 
+# tables are loaded relative to this file, not the working directory
+TABLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tables')
+TABLE_FILES = ('table.csv', 'oxidation.csv', 'amount.csv')
+SNAPSHOT_PATH = os.path.join(TABLES_DIR, 'snapshot.marshal')
+SNAPSHOT_VERSION = 1
+BINARY_TABLE_PATH = os.path.join(TABLES_DIR, 'table.bin')
+# names are matched several times slower in the binary table, so it's only used when asked for
+BINARY_ENV = 'NAZVOSLOVI_BINARY'
+
 # Exceptions
 class NazvosloviException(Exception): pass
 class IncorrectFormat(NazvosloviException): pass
 class UnknownElement(NazvosloviException): pass
 class WrongOxidation(NazvosloviException): pass
+class InvalidTable(NazvosloviException): pass
+class FormulaError(IncorrectFormat):
+    """An error in a formula, `position` is the index of the character that caused it."""
+    def __init__(self, message: str, formula: str, position: int):
+        super().__init__(f'{message} Vzorec "{formula}", pozice {position+1}.')
+        self.formula = formula
+        self.position = position
 
 # load tables
-with open('tables/table.csv', 'r', encoding='utf-8') as file:
-    table = {}
-    for line in file:
-        data = [line.strip() for line in line.split(',')]
-        table[data[1]] = {
-            "proton": int(data[0]),
-            "sign": data[1],
-            "name": data[2],
-            "naming": data[3]
-        }
+def load_csv_tables(directory: str=TABLES_DIR) -> Tuple[dict, dict, list]:
+    """
+    Parses the csv tables.
+    Returns the element table, the oxidation table and the amount table.
+    """
+    return (_load_element_csv(directory), *_load_suffix_csvs(directory))
+
+def _load_element_csv(directory: str=TABLES_DIR) -> dict:
+    """Parses table.csv."""
+    with open(os.path.join(directory, 'table.csv'), 'r', encoding='utf-8') as file:
+        table = {}
+        for line in file:
+            if not line.strip():
+                continue
+            data = [line.strip() for line in line.split(',')]
+            table[data[1]] = {
+                "proton": int(data[0]),
+                "sign": data[1],
+                "name": data[2],
+                "naming": data[3]
+            }
+    return table
+
+def _load_suffix_csvs(directory: str=TABLES_DIR) -> Tuple[dict, list]:
+    """Parses oxidation.csv and amount.csv, for when the element table is memory-mapped."""
+    with open(os.path.join(directory, 'oxidation.csv'), 'r', encoding='utf-8') as file:
+        oxidation_table = {}
+        for line in file:
+            if not line.strip():
+                continue
+            data = [line.strip() for line in line.split(',')]
+            oxidation_table[data[0]] = ['']+data[1:]
+    
+    with open(os.path.join(directory, 'amount.csv'), 'r', encoding='utf-8') as file:
+        amount_table = ['']+[i.strip() for i in file.read().split(',')]
+    
+    return oxidation_table, amount_table
+
+def validate_tables(table: dict, oxidation_table: dict, amount_table: list):
+    """
+    Checks that the tables make sense, raises `InvalidTable` otherwise.
+    """
+    namings = set()
+    for sign,data in table.items():
+        if not re.match(r"^[A-Z][a-z]?$", sign):
+            raise InvalidTable(f'Neplatná značka prvku "{sign}".')
+        if not data['name'] or not data['naming']:
+            raise InvalidTable(f'Prvek "{sign}" nemá název.')
+        if data['naming'] in namings:
+            raise InvalidTable(f'Název "{data["naming"]}" je u více prvků.')
+        namings.add(data['naming'])
+    
+    for key in ('element', 'acid', 'salt'):
+        if len(oxidation_table.get(key, ())) != len(OXIDATION):
+            raise InvalidTable(f'Tabulka oxidace "{key}" musí mít {len(OXIDATION)-1} koncovek.')
+    
+    if len(amount_table) < 2 or not all(amount_table[1:]):
+        raise InvalidTable('Tabulka počtů je prázdná.')
+
+def _table_stamps(directory: str=TABLES_DIR) -> list:
+    """Returns the size and modification time of each csv table, used to check the snapshot."""
+    stamps = []
+    for filename in TABLE_FILES:
+        stat = os.stat(os.path.join(directory, filename))
+        stamps.append((filename, stat.st_size, stat.st_mtime_ns))
+    return stamps
+
+def _code_stamp() -> str:
+    """
+    Returns a checksum of this file, so results saved by a different version of the code aren't used.
+    crc32 is enough to notice a change and zlib imports much faster than hashlib.
+    """
+    import zlib
+    with open(os.path.abspath(__file__), 'rb') as file:
+        data = file.read()
+    return f'{zlib.crc32(data):08x}-{len(data)}'
+
+def build_snapshot(path: str=SNAPSHOT_PATH, directory: str=TABLES_DIR) -> str:
+    """
+    Parses and validates the csv tables and saves them as a marshal snapshot.
+    The snapshot is used instead of the csv tables until they change.
+    Returns the path of the snapshot.
+    """
+    tables = load_csv_tables(directory)
+    validate_tables(*tables)
+    snapshot = {
+        'version': SNAPSHOT_VERSION,
+        'stamps': _table_stamps(directory),
+        'tables': tables,
+    }
+    with open(path, 'wb') as file:
+        file.write(marshal.dumps(snapshot))
+    return path
+
+def load_snapshot(path: str=SNAPSHOT_PATH, directory: str=TABLES_DIR) -> Optional[Tuple[dict, dict, list]]:
+    """
+    Loads the tables from a snapshot.
+    Returns None if there's no snapshot or if it's older than the csv tables.
+    """
+    try:
+        with open(path, 'rb') as file:
+            snapshot = marshal.loads(file.read())
+        if snapshot['version'] != SNAPSHOT_VERSION or snapshot['stamps'] != _table_stamps(directory):
+            return None
+        return snapshot['tables']
+    except (OSError, EOFError, ValueError, TypeError, KeyError):
+        return None
+
+# binary element table: a header, fixed-width records sorted by sign,
+# record numbers sorted by naming and a pool of utf-8 strings
+BINARY_MAGIC = b'NZVT'
+BINARY_VERSION = 2
+BINARY_HEADER = struct.Struct('<4sHHHQQ')  # magic, version, count, naming count, size and mtime of table.csv
+BINARY_RECORD = struct.Struct('<H2sIHIH')  # proton, sign, name offset and length, naming offset and length
+BINARY_INDEX = struct.Struct('<HIH')  # record, naming offset and length
+BINARY_KEYS = ('proton', 'sign', 'name', 'naming')
+
+def build_binary_table(path: str=BINARY_TABLE_PATH, directory: str=TABLES_DIR) -> str:
+    """
+    Parses and validates the csv tables and saves the element table in the binary format.
+    The binary table is used instead of table.csv until it changes.
+    Returns the path of the binary table.
+    """
+    tables = load_csv_tables(directory)
+    validate_tables(*tables)
+    elements = sorted(tables[0].values(), key=lambda data: data['sign'].encode('ascii'))
+    
+    pool = bytearray()
+    def add_string(string: str) -> Tuple[int, int]:
+        data = string.encode('utf-8')
+        pool.extend(data)
+        return len(pool)-len(data), len(data)
+    
+    records = b''.join(
+        BINARY_RECORD.pack(data['proton'], data['sign'].encode('ascii'), *add_string(data['name']), *add_string(data['naming']))
+        for data in elements
+    )
+    # every possible naming, so names are matched without building `naming_trie`
+    namings = sorted(
+        (naming.encode('utf-8'), i)
+        for i,data in enumerate(elements) for naming in _get_possible_naming(data['naming']) if naming
+    )
+    index = b''.join(BINARY_INDEX.pack(i, *add_string(naming.decode('utf-8'))) for naming,i in namings)
+    
+    stat = os.stat(os.path.join(directory, 'table.csv'))
+    header = BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(elements), len(namings), stat.st_size, stat.st_mtime_ns)
+    with open(path, 'wb') as file:
+        file.write(header + records + index + pool)
+    return path
 
-with open('tables/oxidation.csv', 'r', encoding='utf-8') as file:
-    oxidation_table = {}
-    for line in file:
-        data = [line.strip() for line in line.split(',')]
-        oxidation_table[data[0]] = ['']+data[1:]
+class BinaryRecord(Mapping):
+    """
+    A read-only view of one element in a `BinaryTable`.
+    Has the same keys as the elements in `table`, values are read from the file when accessed.
+    """
+    __slots__ = ('_table', '_offset')
+    
+    def __init__(self, table: 'BinaryTable', offset: int):
+        self._table = table
+        self._offset = offset
+    
+    def __repr__(self):
+        return f'BinaryRecord<{dict(self)}>'
+    
+    def __getitem__(self, key: str):
+        proton, sign, name, name_length, naming, naming_length = BINARY_RECORD.unpack_from(self._table._buffer, self._offset)
+        if key == 'sign':
+            return sign.rstrip(b'\0').decode('ascii')
+        elif key == 'naming':
+            return self._table._string(naming, naming_length)
+        elif key == 'name':
+            return self._table._string(name, name_length)
+        elif key == 'proton':
+            return proton
+        raise KeyError(key)
+    
+    def __iter__(self):
+        return iter(BINARY_KEYS)
+    
+    def __len__(self):
+        return len(BINARY_KEYS)
+
+class BinaryTable(Mapping):
+    """
+    The element table read from a memory-mapped binary file.
+    Works like `table`, but nothing is parsed when loading,
+    and processes using the same file share its memory.
+    
+    Elements are found by a binary search, by sign with `[]` and by naming with `find_naming`,
+    names are matched with `match_naming`, so `naming_trie` isn't built for it.
+    """
+    def __init__(self, path: str=BINARY_TABLE_PATH):
+        with open(path, 'rb') as file:
+            self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = BINARY_HEADER.unpack_from(self._buffer)[:2]
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            raise InvalidTable(f'Soubor "{path}" není binární tabulka prvků.')
+        magic, version, self._count, self._namings, *self.stamp = BINARY_HEADER.unpack_from(self._buffer)
+        self._index = BINARY_HEADER.size + self._count*BINARY_RECORD.size
+        self._pool = self._index + self._namings*BINARY_INDEX.size
+    
+    def __repr__(self):
+        return f'BinaryTable<{self._count} elements>'
+    
+    def _string(self, offset: int, length: int) -> str:
+        start = self._pool+offset
+        return self._buffer[start:start+length].decode('utf-8')
+    
+    def _record(self, i: int) -> int:
+        return BINARY_HEADER.size + i*BINARY_RECORD.size
+    
+    def _find_sign(self, sign: bytes) -> Optional[int]:
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo+hi)//2
+            start = self._record(mid)+2
+            found = self._buffer[start:start+2]
+            if found == sign:
+                return self._record(mid)
+            elif found < sign:
+                lo = mid+1
+            else:
+                hi = mid
+        return None
+    
+    def __getitem__(self, sign: str) -> BinaryRecord:
+        try:
+            key = sign.encode('ascii').ljust(2, b'\0')
+        except (AttributeError, UnicodeEncodeError):
+            raise KeyError(sign)
+        offset = self._find_sign(key) if len(key) == 2 else None
+        if offset is None:
+            raise KeyError(sign)
+        return BinaryRecord(self, offset)
+    
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self._count):
+            start = self._record(i)+2
+            yield self._buffer[start:start+2].rstrip(b'\0').decode('ascii')
+    
+    def __len__(self):
+        return self._count
+    
+    def _naming(self, position: int) -> Tuple[int, bytes]:
+        """Returns the record number and the naming at a position of the naming index."""
+        i, start, length = BINARY_INDEX.unpack_from(self._buffer, self._index + position*BINARY_INDEX.size)
+        start += self._pool
+        return i, self._buffer[start:start+length]
+    
+    def _bisect_naming(self, key: bytes) -> int:
+        """Returns the position after the namings that aren't greater than `key`."""
+        buffer, unpack, index, size, pool = self._buffer, BINARY_INDEX.unpack_from, self._index, BINARY_INDEX.size, self._pool
+        lo, hi = 0, self._namings
+        while lo < hi:
+            mid = (lo+hi)//2
+            _, start, length = unpack(buffer, index + mid*size)
+            if buffer[pool+start:pool+start+length] <= key:
+                lo = mid+1
+            else:
+                hi = mid
+        return lo
+    
+    def find_naming(self, naming: str) -> Optional[BinaryRecord]:
+        """Returns the element with exactly this naming, or one of its variants from `_get_possible_naming`, or None."""
+        key = naming.encode('utf-8')
+        position = self._bisect_naming(key)
+        if position:
+            i, found = self._naming(position-1)
+            if found == key:
+                return BinaryRecord(self, self._record(i))
+        return None
     
-with open('tables/amount.csv', 'r', encoding='utf-8') as file:
-    amount_table = ['']+[i.strip() for i in file.read().split(',')]
+    def match_naming(self, name: str) -> Optional[Tuple[BinaryRecord, str, str]]:
+        """
+        Finds the longest naming the name starts with, the same one `naming_trie` would.
+        Returns the element, the naming and the rest of the name, or None.
+        
+        Namings sorted between a prefix of the name and the name itself all start with that prefix,
+        so if the naming before the name isn't its prefix, only prefixes of what they share are left.
+        """
+        key = name.encode('utf-8')
+        while key:
+            position = self._bisect_naming(key)
+            if not position:
+                return None
+            i, found = self._naming(position-1)
+            if key.startswith(found):
+                naming = found.decode('utf-8')
+                return BinaryRecord(self, self._record(i)), naming, name[len(naming):]
+            shared = 0
+            for a, b in zip(key, found):
+                if a != b:
+                    break
+                shared += 1
+            key = key[:shared]
+        return None
+
+def load_binary_table(path: str=BINARY_TABLE_PATH, directory: str=TABLES_DIR) -> Optional[BinaryTable]:
+    """
+    Memory-maps the binary element table.
+    Returns None if there's no binary table or if it's older than table.csv.
+    """
+    try:
+        binary = BinaryTable(path)
+        stat = os.stat(os.path.join(directory, 'table.csv'))
+    except (OSError, ValueError, struct.error, InvalidTable):
+        return None
+    if binary.stamp != [stat.st_size, stat.st_mtime_ns]:
+        return None
+    return binary
+
+def load_tables() -> Tuple[Mapping, dict, list]:
+    """
+    Loads the tables from the snapshot if it's up to date, otherwise from the csv tables.
+    If `NAZVOSLOVI_BINARY` is set, the element table is memory-mapped from the binary table if it's up to date,
+    then only the oxidation and amount tables are parsed.
+    """
+    binary = load_binary_table() if os.environ.get(BINARY_ENV) else None
+    if binary is not None:
+        return (binary, *_load_suffix_csvs())
+    return load_snapshot() or load_csv_tables()
+
+def freeze_tables(table: dict, oxidation_table: dict, amount_table: list) -> Tuple[Mapping, Mapping, tuple]:
+    """
+    Makes the tables immutable so they can be shared between threads.
+    A `BinaryTable` is read-only already.
+    """
+    if not isinstance(table, BinaryTable):
+        table = MappingProxyType({k: MappingProxyType(data) for k,data in table.items()})
+    return (
+        table,
+        MappingProxyType({k: tuple(data) for k,data in oxidation_table.items()}),
+        tuple(amount_table),
+    )
+
+table, oxidation_table, amount_table = freeze_tables(*load_tables())
 
 # functions for creating compounds
 def is_compound_name(s: str, doraise: bool=True) -> bool:
@@ -73,33 +415,144 @@ def _get_possible_naming(naming: Optional[str]) -> Set[str]:
     
     return possible
 
+def _build_oxidation_suffixes() -> Mapping:
+    """
+    Creates a dict of `{tablekey: {suffix: oxidation}}` from `oxidation_table`.
+    The "ečn" variants of the "ičn" suffixes are included.
+    """
+    suffixes = {}
+    for tablekey, row in oxidation_table.items():
+        lookup = {}
+        for i,suffix in enumerate(row):
+            lookup.setdefault(suffix, i)
+        for suffix in row:
+            if 'ičn' in suffix:
+                lookup.setdefault(suffix.replace('ičn', 'ečn'), 5)
+        suffixes[tablekey] = MappingProxyType(lookup)
+    return MappingProxyType(suffixes)
+
+oxidation_suffixes = _build_oxidation_suffixes()
+
 def _load_oxidation(oxidation: str, tablekey='element') -> str:
     """
     Takes in an oxidation připona.
     Returns the oxidation number. 
     """
-    for i,o in enumerate(oxidation_table[tablekey]):
-        if oxidation == o:
-            return i
+    i = oxidation_suffixes[tablekey].get(oxidation)
+    if i is not None:
+        return i
     if 'ečn' in oxidation:
         return 5
     raise WrongOxidation(f'Nebyla rozpoznána koncovka oxidace "{oxidation}".')
 
-def load_name(name: str, tablekey='element') -> Tuple[dict, int]:
+def _build_amount_prefixes() -> Tuple[Mapping, dict]:
+    """
+    Creates a dict of `{prefix: amount}` from `amount_table` and a prefix trie of the non-empty prefixes.
+    The trie is built like `naming_trie`, but the end of a prefix holds its amount.
+    """
+    lookup = {}
+    for i,prefix in enumerate(amount_table):
+        lookup.setdefault(prefix, i)
+    
+    trie = {}
+    for prefix,i in lookup.items():
+        if not prefix:
+            continue
+        node = trie
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node[None] = i
+    return MappingProxyType(lookup), trie
+
+amount_prefixes, amount_trie = _build_amount_prefixes()
+
+def load_amount(prefix: str) -> int:
+    """
+    Takes in an amount prefix like "di" and returns the amount.
+    Raises `ValueError` if it's not in `amount_table`.
+    """
+    i = amount_prefixes.get(prefix)
+    if i is None:
+        raise ValueError(f'Neznámý počet "{prefix}".')
+    return i
+
+def _match_amount(name: str) -> Optional[int]:
+    """
+    Walks the amount trie with a name.
+    Returns the amount of the prefix the name starts with, the first one in `amount_table` if more of them match.
+    """
+    node = amount_trie
+    match = None
+    for char in name:
+        node = node.get(char)
+        if node is None:
+            break
+        if None in node and (match is None or node[None] < match):
+            match = node[None]
+    return match
+
+def _build_naming_trie() -> dict:
     """
-    Takes in an elements name, returns its data and oxidation.
+    Creates a prefix trie of all possible namings in `table`.
+    Every node is a dict of characters, the end of a naming is marked with a `None` key.
     """
-    for k, data in table.items():
+    trie = {}
+    for data in table.values():
         for naming in _get_possible_naming(data['naming']):
-            if naming and name.startswith(naming):
-                oxidation = name.replace(naming, '')
-                data['naming'] = naming
-                return (
-                    data,
-                    _load_oxidation(oxidation,tablekey)
-                )
+            if not naming:
+                continue
+            node = trie
+            for char in naming:
+                node = node.setdefault(char, {})
+            node[None] = (data, naming)
+    return trie
+
+# a `BinaryTable` matches names with its own mapped index
+naming_trie = None if isinstance(table, BinaryTable) else _build_naming_trie()
+
+def _match_naming(name: str) -> Optional[Tuple[Mapping, str, str]]:
+    """
+    Walks the naming trie with a name.
+    Returns the element's data, the longest matching naming and the rest of the name.
+    """
+    if naming_trie is None:
+        return table.match_naming(name)
+    node = naming_trie
+    match = None
+    for i,char in enumerate(name):
+        node = node.get(char)
+        if node is None:
+            break
+        if None in node:
+            match = i+1
+            data, naming = node[None]
+    
+    if match is None:
+        return None
+    return data, naming, name[match:]
+
+def load_name(name: str, tablekey='element') -> Tuple[Mapping, str, int]:
+    """
+    Takes in an elements name, returns its data, the naming that matched and oxidation.
+    The table is never changed, so this is safe to call from multiple threads.
+    """
+    prof = profiler
+    if prof is not None:
+        start = time.perf_counter()
+    
+    match = _match_naming(name)
+    if match is None:
+        raise UnknownElement(f'Nebyl rozpoznán prvek "{name}"')
     
-    raise UnknownElement(f'Nebyl rozpoznán prvek "{name}"')
+    data, naming, oxidation = match
+    result = (
+        data,
+        naming,
+        _load_oxidation(oxidation,tablekey)
+    )
+    if prof is not None:
+        prof.record('load_name', prof.current, time.perf_counter()-start)
+    return result
 
 def parse_element_sign(s: str) -> Tuple[str,int]:
     """
@@ -113,6 +566,7 @@ def parse_element_sign(s: str) -> Tuple[str,int]:
         else:
             return s[:2], int(s[2:]) if s[2:] else 1
 
+@lru_cache(maxsize=1024)
 def subscript(amount: int, oxidation: int=None) -> str:
     """
     Takes an amount and optional oxidation.
@@ -152,6 +606,9 @@ def cross_rule(x,y) -> Tuple[int,int]:
 # =============================================================================
 # Compounds
 
+# keys of `BaseCompound.todict`, also the columns of exported results
+COMPOUND_FIELDS = ('typename', 'name', 'sign', 'oxisign')
+
 class BaseCompound:
     """
     Base chemical compound.
@@ -159,12 +616,27 @@ class BaseCompound:
     Has oxidation and amount.
     
     Contains a regex for sign and name for automatically recognizing compounds.
+    
+    Compounds use `__slots__` to save memory, subclasses should define them too.
     """
+    __slots__ = ('oxidation', 'amount', '_rendered')
     typename: str = 'neznámá sloučenina'
     re_sign: re.Pattern = re.compile("")
     re_name: re.Pattern = re.compile("")
-    oxidation: int = 0
-    amount: int = 1
+    # which entries `CompoundRegistry` matches with the regexes, "*" is every entry
+    name_keys: frozenset = frozenset({'*'})
+    sign_keys: frozenset = frozenset({'*'})
+    # whether every name has a space, entries without one are then only matched as formulas
+    spaced_name: bool = False
+    _frozen: bool = False
+    
+    def __new__(cls, *args, **kwargs):
+        # slots can't have class defaults
+        self = super().__new__(cls)
+        self.oxidation = 0
+        self.amount = 1
+        self._rendered = None
+        return self
     
     def __init__(self, sign: str, name: bool=None, **special_kwargs):
         """
@@ -174,6 +646,49 @@ class BaseCompound:
         """
         return
     
+    def _parts(self, sign: str, name: bool) -> dict:
+        """
+        Matches the sign or name with the Compound's regex and returns its named groups.
+        Raises `IncorrectFormat` if it doesn't match.
+        """
+        match = (self.re_name if name else self.re_sign).match(sign)
+        if match is None:
+            if not name:
+                # point at the wrong character if the formula itself is wrong
+                tokenize_formula(sign)
+            raise IncorrectFormat(f'Sloučenina "{sign}" není {self.typename}.')
+        return match.groupdict()
+    
+    def freeze(self) -> 'BaseCompound':
+        """
+        Makes the Compound and all of its parts immutable.
+        Used for compounds that are shared, like cached ones.
+        
+        The compound's class is swapped for a frozen subclass,
+        so compounds that are never frozen don't pay for the check.
+        Elements are replaced with shared frozen ones, since they can't change anymore.
+        """
+        if self._frozen:
+            return self
+        for attr in _slot_names(type(self)):
+            value = getattr(self, attr, None)
+            if attr == '_rendered':
+                continue
+            if isinstance(value, Element):
+                setattr(self, attr, _shared_element(value))
+            elif isinstance(value, BaseCompound):
+                value.freeze()
+        self.__class__ = _frozen_class(type(self))
+        return self
+    
+    def __getstate__(self):
+        # rendered forms are cheaper to create again than to save
+        return {attr: getattr(self, attr) for attr in _slot_names(type(self)) if attr != '_rendered' and hasattr(self, attr)}
+    
+    def __setstate__(self, state):
+        for attr,value in state.items():
+            object.__setattr__(self, attr, value)
+    
     def __repr__(self):
         """Returns the representation of the Compound."""
         return self.__class__.__name__+f'<"{self.__str__()}" {self.oxidation}>'
@@ -201,28 +716,116 @@ class BaseCompound:
     @property
     def name(self) -> str:
         """Name of compound."""
-        return self.toname()
+        if self._rendered is not None:
+            return self._rendered[0]
+        if profiler is None:
+            return self.toname()
+        return self._profiled('toname', self.toname)
     @property
     def sign(self) -> str:
         """Sign of compound."""
-        return self.tosign(False)
+        if self._rendered is not None:
+            return self._rendered[1]
+        if profiler is None:
+            return self.tosign(False)
+        return self._profiled('tosign', self.tosign, False)
     @property
     def oxisign(self) -> str:
         """Sign of compound with oxidation."""
-        return self.tosign(True)
+        if self._rendered is not None:
+            return self._rendered[2]
+        if profiler is None:
+            return self.tosign(True)
+        return self._profiled('tosign', self.tosign, True)
+    
+    def render(self) -> Tuple[str, str, str]:
+        """
+        Returns the name, the sign and the sign with oxidation.
+        Frozen compounds can't change, so they keep them and render only once.
+        """
+        rendered = self._rendered
+        if rendered is None:
+            rendered = (self.name, self.sign, self.oxisign)
+            if self._frozen:
+                object.__setattr__(self, '_rendered', rendered)
+        return rendered
     
     def todict(self, **extra) -> dict:
         """
         Takes in a compund, returns a dictionary of names.
         Used for cmd arguments.
         """
-        return {
-            'typename': self.typename,
-            'name': self.name,
-            'sign': self.sign,
-            'oxisign': self.oxisign,
-            **extra
-        }
+        if profiler is not None:
+            return self._profiled('todict', self._todict, extra)
+        return self._todict(extra)
+    
+    def _todict(self, extra: dict) -> dict:
+        result = dict(zip(COMPOUND_FIELDS, (self.typename, *self.render())))
+        result.update(extra)
+        return result
+    
+    def _profiled(self, stage: str, method, *args):
+        """Calls a rendering method and records it in `profiler`."""
+        prof = profiler
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            if prof is not None:
+                # frozen compounds are instances of a subclass created at runtime
+                cls = type(self).__mro__[1] if self._frozen else type(self)
+                prof.record(stage, cls.__name__, time.perf_counter()-start)
+
+def _frozen_setattr(self, attr, value=None):
+    raise AttributeError(f'Sloučenina {self!r} je zmrazená, "{attr}" nelze změnit.')
+
+def _frozen_reduce(self, protocol):
+    # frozen classes are created at runtime, so they're pickled as their base class
+    return _unpickle_frozen, (type(self).__mro__[1], self.__getstate__())
+
+def _unpickle_frozen(cls: type, state: dict) -> 'BaseCompound':
+    compound = cls.__new__(cls)
+    compound.__setstate__(state)
+    return compound.freeze()
+
+_frozen_classes = {}
+_slot_names_cache = {}
+_shared_elements = {}
+
+def _slot_names(cls: type) -> Tuple[str, ...]:
+    """Returns the names of all slots of a compound class."""
+    names = _slot_names_cache.get(cls)
+    if names is None:
+        names = _slot_names_cache[cls] = tuple(
+            name for base in cls.__mro__ for name in base.__dict__.get('__slots__', ())
+        )
+    return names
+
+def _shared_element(element: 'Element') -> 'Element':
+    """
+    Returns a frozen element that's shared by all frozen compounds.
+    Elements with the same sign, naming, oxidation and amount are the same.
+    """
+    key = (element._data['sign'], element.naming, element.oxidation, element.amount)
+    shared = _shared_elements.get(key)
+    if shared is None:
+        shared = _shared_elements.setdefault(key, element.freeze())
+    return shared
+
+def _frozen_class(cls: type) -> type:
+    """Returns a subclass of a compound class that doesn't allow changing attributes."""
+    frozen = _frozen_classes.get(cls)
+    if frozen is None:
+        frozen = _frozen_classes[cls] = type(cls.__name__, (cls,), {
+            '__slots__': (),
+            '__qualname__': cls.__qualname__,
+            '__module__': cls.__module__,
+            '__setattr__': _frozen_setattr,
+            '__delattr__': _frozen_setattr,
+            '__reduce_ex__': _frozen_reduce,
+            '_frozen': True,
+        })
+    return frozen
 
 class Element(BaseCompound):
     """
@@ -231,6 +834,7 @@ class Element(BaseCompound):
     
     Oxidation may be None (unknown).
     """
+    __slots__ = ('_data', 'naming')
     typename = 'prvek'
     re_sign = re.compile(r"^[A-Z][a-z]?\d{0,2}$")
     re_name = re.compile(r"^[^ 0-9]*$")
@@ -249,12 +853,13 @@ class Element(BaseCompound):
         
         if name:
             # simply load the name
-            self._data, self.oxidation = load_name(sign.lower(),tablekey)
+            self._data, self.naming, self.oxidation = load_name(sign.lower(),tablekey)
         else:
             # parse sign
             sign,self.amount = parse_element_sign(sign)
             # set data and set oxidation as unknown
             self._data = table[sign.title()]
+            self.naming = self._data['naming']
             self.oxidation = None
         
         # set the special variables
@@ -263,6 +868,16 @@ class Element(BaseCompound):
         if amount is not None:
             self.amount = amount
     
+    def __getstate__(self):
+        # the table records can't be pickled, so only their sign is saved
+        state = super().__getstate__()
+        state['_data'] = self._data['sign']
+        return state
+    
+    def __setstate__(self, state):
+        state['_data'] = table[state['_data']]
+        super().__setstate__(state)
+    
     def get_oxidation(self) -> int:
         """Returns amount*oxidation."""
         return self.oxidation*self.amount
@@ -275,8 +890,10 @@ class Element(BaseCompound):
     
     def toname(self,tablekey='element'):
         if self.oxidation is not None and self.oxidation>0:
-            oxidation_name = oxidation_table[tablekey][self.oxidation]
-            return self._data['naming']+oxidation_name
+            names = oxidation_table[tablekey]
+            if self.oxidation >= len(names):
+                raise NazvosloviException(f'Prvek {self._data["sign"]} nemůže mít oxidační číslo {self.oxidation}.')
+            return self.naming+names[self.oxidation]
         else:
             return self._data['name']
 
@@ -286,34 +903,35 @@ class SingleElementCompound(BaseCompound):
     
     For inheretance, you must set a `main_sign`, `main_name` and `main_oxidation`.
     """
+    __slots__ = ('main', 'alt')
     typename = 'neznámá dvouprvková sloučenina'
     main_sign = ''
     main_name = ''
     main_oxidation = 0
     
-    def __init__(self, sign: str, name=None):
+    def __init__(self, sign: str, name=None, *, parts: dict=None):
         """
         Takes in a sign and creates an element with it.
         You can specify wheter the element is a name or a sign with `name`.
         If not set, it is automatically figured out with regex.
+        
+        `parts` are the named groups of an already matched regex, used by `recognize`.
         """
         if name is None:
             name = is_compound_name(sign)
+        if parts is None:
+            parts = self._parts(sign, name)
         
         if name:
-            # take out the name of main element out of sign
-            main,alt = sign.split()
             # create elements
             self.main = Element(self.main_sign, False, oxidation=self.main_oxidation)
-            self.alt = Element(alt,True)
+            self.alt = Element(parts['alt'],True)
             # do cross rule to complete
             self.main.amount,self.alt.amount = cross_rule(self.main.oxidation,self.alt.oxidation)
         else:
-            # take out the sign of main element out of sign
-            alt,main = sign.split()
             # create elements
-            self.main = Element(main, oxidation=self.main_oxidation)
-            self.alt = Element(alt)
+            self.main = Element(parts['main'],False,oxidation=self.main_oxidation)
+            self.alt = Element(parts['alt'],False)
             self.alt.oxidation = -self.main.get_oxidation()//self.alt.amount
             self.main.amount,self.alt.amount = factor(self.main.amount,self.alt.amount) # somewhere in the code an errror was caused
     
@@ -327,9 +945,13 @@ class Oxid(SingleElementCompound):
     """
     An Oxid+Element chemical Compound.
     """
+    __slots__ = ()
     typename = 'oxid'
-    re_sign = re.compile(r"^[A-Z][a-z]?\d{0,2} ?O\d{0,2}$") # `element_sign`+oxid sign
-    re_name = re.compile(r"^oxid [^ 0-9]*$") # "oxid "+`element_name`
+    re_sign = re.compile(r"^(?P<alt>[A-Z][a-z]?\d{0,2}) ?(?P<main>O\d{0,2})$") # `element_sign`+oxid sign
+    re_name = re.compile(r"^oxid (?P<alt>[^ 0-9]*)$") # "oxid "+`element_name`
+    name_keys = frozenset({'oxid'})
+    sign_keys = frozenset({'H', 'formula'})
+    spaced_name = True
     main_sign = 'O'
     main_name = 'oxid'
     main_oxidation = -2
@@ -338,9 +960,13 @@ class Sulfid(SingleElementCompound):
     """
     An Oxid+Element chemical Compound.
     """
+    __slots__ = ()
     typename = 'sulfid'
-    re_sign = re.compile(r"^[A-Z][a-z]?\d{0,2} ?S\d{0,2}$") # `element_sign`+sulfid sign
-    re_name = re.compile(r"^sulfid [^ 0-9]*$") # "oxid "+`element_name`
+    re_sign = re.compile(r"^(?P<alt>[A-Z][a-z]?\d{0,2}) ?(?P<main>S\d{0,2})$") # `element_sign`+sulfid sign
+    re_name = re.compile(r"^sulfid (?P<alt>[^ 0-9]*)$") # "sulfid "+`element_name`
+    name_keys = frozenset({'sulfid'})
+    sign_keys = frozenset({'H', 'formula'})
+    spaced_name = True
     main_sign = 'S'
     main_name = 'sulfid'
     main_oxidation = -2
@@ -351,34 +977,37 @@ class Acid(BaseCompound):
     
     Only oxidized acids are allowed.
     """
+    __slots__ = ('hydrogen', 'element', 'oxygen')
     typename = 'kyselina'
-    re_sign = re.compile(r"^H\d{0,2} ?[A-Z][a-z]?\d{0,2} ?O\d{0,2}$") # Hx+Xx+Ox
-    re_name = re.compile(r"^kyselina ([a-z]{2,6}hydrogen )?[^ 0-9]*$") # 'kyselina'+hydrogen+`element_name`
+    re_sign = re.compile(r"^(?P<hydrogen>H\d{0,2}) ?(?P<element>[A-Z][a-z]?\d{0,2}) ?(?P<oxygen>O\d{0,2})$") # Hx+Xx+Ox
+    re_name = re.compile(r"^kyselina (?:(?P<hydrogen>[a-z]{0,6})hydrogen ?)?(?P<element>[^ 0-9]*)$") # 'kyselina'+hydrogen+`element_name`
+    name_keys = frozenset({'kyselina'})
+    sign_keys = frozenset({'H'})
+    spaced_name = True
     
-    def __init__(self, sign, name: bool=None):
+    def __init__(self, sign, name: bool=None, *, parts: dict=None):
         """
         Takes in a sign and creates an element with it.
         You can specify wheter the element is a name or a sign with `name`.
         If not set, it is automatically figured out with regex.
+        
+        `parts` are the named groups of an already matched regex, used by `recognize`.
         """
         if name is None:
             name = is_compound_name(sign)
+        if parts is None:
+            parts = self._parts(sign, name)
         
         if name:
             # acid is only a literal "kyselina"
-            if 'hydrogen' in sign:
-                # take out hydrogen and element
-                acid,element = sign.split()
-                hydrogen,element = element.split('hydrogen')
+            if parts['hydrogen'] is not None:
                 # figure out the number of hydrogens
-                hydrogen = amount_table.index(hydrogen)
+                hydrogen = load_amount(parts['hydrogen'])
                 # create the element with the acid
-                self.element = Element(element,True,tablekey='acid')
+                self.element = Element(parts['element'],True,tablekey='acid')
             else:
-                # take out an element
-                acid,element = sign.split()
                 # create the element with the acid
-                self.element = Element(element,True,tablekey='acid')
+                self.element = Element(parts['element'],True,tablekey='acid')
                 # figure out the number of hydrogens
                 hydrogen = 2 if self.element.get_oxidation()%2 == 0 else 0
             
@@ -387,13 +1016,11 @@ class Acid(BaseCompound):
             # create the oxygen by completing oxidation so it's 0
             self.oxygen = Element(f'O',amount=(self.hydrogen.get_oxidation()+self.element.get_oxidation())//2,oxidation=-2)
         else:
-            # take out hydrogen, element and oxygen
-            hydrogen,element,oxygen = sign.split()
             # create obvious hydrogen and oxygen
-            self.hydrogen = Element(hydrogen, oxidation=1)
-            self.oxygen = Element(oxygen, oxidation=-2)
+            self.hydrogen = Element(parts['hydrogen'],False,oxidation=1)
+            self.oxygen = Element(parts['oxygen'],False,oxidation=-2)
             # figure out the element by completing oxidation so it's 0
-            self.element = Element(element, oxidation=-(self.oxygen.get_oxidation()+self.hydrogen.get_oxidation()))
+            self.element = Element(parts['element'],False,oxidation=-(self.oxygen.get_oxidation()+self.hydrogen.get_oxidation()))
     
     def tosign(self, oxidation: bool=False):
         return self.hydrogen.tosign(oxidation)+self.element.tosign(oxidation)+self.oxygen.tosign(oxidation)
@@ -410,27 +1037,29 @@ class SaltAcid(BaseCompound):
     
     Used as the acid part for salt.
     """
+    __slots__ = ('element', 'oxygen')
     typename = 'kyselina soli'
+    re_sign = re.compile(r"^(?P<element>[A-Z][a-z]?\d{0,2}) ?(?P<oxygen>O\d{0,2})$") # `element_sign`+'O'x
     
-    def __init__(self, sign: str, name: bool=None, amount: int=..., oxidation: int=...):
+    def __init__(self, sign: str, name: bool=None, amount: int=..., oxidation: int=..., *, parts: dict=None):
         """
         Takes in a sign and creates an element with it.
         You can specify wheter the element is a name or a sign with `name`.
         If not set, it is automatically figured out with regex.
         
         You must set an oxidation and amount if giving a sign.
+        `parts` are the named groups of an already matched sign.
         """
         if name is None:
             name = is_compound_name(sign)
         
         if name:
             # detect multiple elements
-            for element_amount,s in enumerate(amount_table[1:],1):
-                if sign.startswith(s):
-                    sign = sign.replace(s,'')
-                    # create the element from the name and amount
-                    self.element = Element(sign,True,tablekey='salt',amount=element_amount)
-                    break
+            element_amount = _match_amount(sign)
+            if element_amount is not None:
+                sign = sign.replace(amount_table[element_amount],'')
+                # create the element from the name and amount
+                self.element = Element(sign,True,tablekey='salt',amount=element_amount)
             else:
                 # create the element from the name
                 self.element = Element(sign,True,tablekey='salt')
@@ -442,12 +1071,12 @@ class SaltAcid(BaseCompound):
             # save oxidation and amount
             self.oxidation = oxidation
             self.amount = amount
-            # take out element and oxygen
-            element,oxygen = sign.split()
+            if parts is None:
+                parts = self._parts(sign, False)
             # create element and oxygen
-            self.oxygen = Element(oxygen,oxidation=-2)
+            self.oxygen = Element(parts['oxygen'],False,oxidation=-2)
             # figure out the oxygen by completing oxidation so it's `self.oxidation`
-            self.element = Element(element,oxidation=-(self.oxygen.get_oxidation()-self.oxidation))
+            self.element = Element(parts['element'],False,oxidation=-(self.oxygen.get_oxidation()-self.oxidation))
     
     def _tosign(self, oxidation: bool=False):
         return self.element.tosign(oxidation)+self.oxygen.tosign(oxidation)
@@ -459,41 +1088,45 @@ class Salt(BaseCompound):
     """
     A salt, containing an element and a salt without hydrogen.
     """
+    __slots__ = ('element', 'acid')
     typename = 'sůl'
-    re_sign = re.compile(r"^[A-Z][a-z]?\d{0,2} ?\(?[A-Z][a-z]?\d{0,2} ?O\d{0,2}\)?\d{0,2}?$") # `element_sign`+('(')+`element_sign`+'O'x+(')')
-    re_name = re.compile(r"^(?![a-z]*hydrogen)[^ 0-9]*an [^ 0-9]*$") # `element_name`+'an'+`element_name`
+    re_sign = re.compile(r"^(?P<element>[A-Z][a-z]?\d{0,2}) ?(?P<bracket>\()?(?P<acid>(?P<acid_element>[A-Z][a-z]?\d{0,2}) ?(?P<acid_oxygen>O\d{0,2}))(?(bracket)\)(?P<acid_amount>\d{1,2}))$") # `element_sign`+('(')+`element_sign`+'O'x+(')')
+    re_name = re.compile(r"^(?![a-z]*hydrogen)(?P<acid>[^ 0-9]*an) (?P<element>[^ 0-9]*)$") # `element_name`+'an'+`element_name`
+    # the name of the acid can be any word
+    name_keys = frozenset({'*'})
+    sign_keys = frozenset({'H', 'formula', 'bracket'})
+    spaced_name = True
     
-    def __init__(self, sign: str, name: bool=None):
+    def __init__(self, sign: str, name: bool=None, *, parts: dict=None):
         """
         Takes in a sign and creates an element with it.
         You can specify wheter the element is a name or a sign with `name`.
         If not set, it is automatically figured out with regex.
+        
+        `parts` are the named groups of an already matched regex, used by `recognize`.
         """
         if name is None:
             name = is_compound_name(sign)
+        if parts is None:
+            parts = self._parts(sign, name)
         
         if name:
-            # take out acid and element
-            acid,element = sign.split()
             # create element and acid
-            self.element = Element(element,True)
-            self.acid = SaltAcid(acid,True)
+            self.element = Element(parts['element'],True)
+            self.acid = SaltAcid(parts['acid'],True)
             # use cross rule
             self.element.amount,self.acid.amount = cross_rule(self.element.oxidation,self.acid.oxidation)
         else:
-            # take out element and acid
-            element,acid = sign.split(maxsplit=1)
             # figure out the acid amount in case it is set, otherwise 1
-            if '(' in acid:
-                acid,acid_amount = acid[1:].split(')')
-                acid_amount = int(acid_amount)
-            else:
-                acid_amount = 1
+            acid_amount = int(parts['acid_amount'] or 1)
             # create element and acid
-            self.element = Element(element)
+            self.element = Element(parts['element'],False)
             # use cross rule
             self.element.oxidation,acid_oxidation = cross_rule(self.element.amount,acid_amount)
-            self.acid = SaltAcid(acid,False,amount=acid_amount,oxidation=acid_oxidation)
+            self.acid = SaltAcid(
+                parts['acid'],False,amount=acid_amount,oxidation=acid_oxidation,
+                parts={'element': parts['acid_element'], 'oxygen': parts['acid_oxygen']}
+            )
     
     def tosign(self, oxidation: bool=False):
         return self.element.tosign(oxidation)+self.acid.tosign(oxidation)
@@ -507,30 +1140,33 @@ class HydrogenAcid(BaseCompound):
     
     Used in hydrogen salt.
     """
+    __slots__ = ('hydrogen', 'element', 'oxygen')
     typename = 'kyselina hydrogensoli'
-    amount = 1
+    re_sign = re.compile(r"^(?P<hydrogen>H\d{0,2}) ?(?P<element>[A-Z][a-z]?\d{0,2}) ?(?P<oxygen>O\d{0,2})$") # 'H'x+`element_sign`+'O'x
+    re_name = re.compile(r"^(?P<hydrogen>[^ 0-9]*?)hydrogen(?P<element>[^ 0-9]*)$") # hydrogen+`element_name`
     
-    def __init__(self, sign: str, name: bool=None, amount: int=..., oxidation: int=...):
+    def __init__(self, sign: str, name: bool=None, amount: int=..., oxidation: int=..., *, parts: dict=None):
         """
         Takes in a sign and creates an element with it.
         You can specify wheter the element is a name or a sign with `name`.
         If not set, it is automatically figured out with regex.
         
         You must set an amount and oxidation if giving a sign.
+        `parts` are the named groups of an already matched regex.
         """
         if name is None:
             name = is_compound_name(sign)
+        if parts is None:
+            parts = self._parts(sign, name)
         
         if name:
-            # take out the wanted hydrogens and element
-            expected_hydrogen,element = sign.split('hydrogen')
             # get the amount of hydrogens that will stay in acid
-            if expected_hydrogen:
-                expected_hydrogen = amount_table.index(expected_hydrogen)
+            if parts['hydrogen']:
+                expected_hydrogen = load_amount(parts['hydrogen'])
             else:
                 expected_hydrogen = 1
             # make acid
-            self.element = Element(element,True,tablekey='salt')
+            self.element = Element(parts['element'],True,tablekey='salt')
             # figure out hydrogens
             hydrogens = 2 if self.element.get_oxidation()%2 == 0 else 1
             # complete the missing hydrogens so there's no negative hydrogens
@@ -551,13 +1187,11 @@ class HydrogenAcid(BaseCompound):
             self.oxidation = oxidation
             self.amount = amount
             
-            # take out expected hydrogen, element and oxygen
-            expected_hydrogen,element,oxygen = sign.split()
             # create hydrogen, oxygen and element
-            self.hydrogen = Element(expected_hydrogen,oxidation=1)
-            self.oxygen = Element(oxygen,oxidation=-2)
+            self.hydrogen = Element(parts['hydrogen'],False,oxidation=1)
+            self.oxygen = Element(parts['oxygen'],False,oxidation=-2)
             # figure out the oxygen by completing oxidation so it's 0
-            self.element = Element(element,oxidation=-(self.oxygen.get_oxidation()+self.hydrogen.get_oxidation()-self.oxidation))
+            self.element = Element(parts['element'],False,oxidation=-(self.oxygen.get_oxidation()+self.hydrogen.get_oxidation()-self.oxidation))
     
     def _tosign(self, oxidation: bool=False):
         return self.hydrogen.tosign(oxidation)+self.element.tosign(oxidation)+self.oxygen.tosign(oxidation)
@@ -569,41 +1203,46 @@ class HydrogenSalt(BaseCompound):
     """
     A salt with and acid that has hydrogens.
     """
+    __slots__ = ('element', 'acid')
     typename = 'hydrogensůl'
-    re_sign = re.compile(r"^[A-Z][a-z]?\d{0,2} ?\(?H\d{0,2} ?[A-Z][a-z]?\d{0,2} ?O\d{0,2}\)?\d{0,2}?$") # `element_sign`+('(')+'H'x+`element_sign`+'O'x+(')')
-    re_name = re.compile(r"^([a-z]{2,6})?hydrogen[^ 0-9]*an [^ 0-9]*$") # hydrogen+`element_name`an+`element_name`
-    def __init__(self, sign: str, name: bool=None):
+    re_sign = re.compile(r"^(?P<element>[A-Z][a-z]?\d{0,2}) ?(?P<bracket>\()?(?P<acid>(?P<acid_hydrogen>H\d{0,2}) ?(?P<acid_element>[A-Z][a-z]?\d{0,2}) ?(?P<acid_oxygen>O\d{0,2}))(?(bracket)\)(?P<acid_amount>\d{1,2}))$") # `element_sign`+('(')+'H'x+`element_sign`+'O'x+(')')
+    re_name = re.compile(r"^(?P<acid>(?P<acid_hydrogen>[a-z]{2,6})?hydrogen(?P<acid_element>[^ 0-9]*an)) (?P<element>[^ 0-9]*)$") # hydrogen+`element_name`an+`element_name`
+    name_keys = frozenset({'hydrogen'})
+    sign_keys = frozenset({'H', 'formula', 'bracket'})
+    spaced_name = True
+    def __init__(self, sign: str, name: bool=None, *, parts: dict=None):
         """
         Takes in a sign and creates an element with it.
         You can specify wheter the element is a name or a sign with `name`.
         If not set, it is automatically figured out with regex.
+        
+        `parts` are the named groups of an already matched regex, used by `recognize`.
         """
         if name is None:
             name = is_compound_name(sign)
+        if parts is None:
+            parts = self._parts(sign, name)
         
         if name:
-            # take out acid and element
-            acid,element = sign.split()
             # create acid and element
-            self.acid = HydrogenAcid(acid,True)
-            self.element = Element(element,True)
+            self.acid = HydrogenAcid(
+                parts['acid'],True,
+                parts={'hydrogen': parts['acid_hydrogen'], 'element': parts['acid_element']}
+            )
+            self.element = Element(parts['element'],True)
             # use cross rule
             self.element.amount,self.acid.amount = cross_rule(self.element.oxidation,self.acid.oxidation)
         else:
-            # take out element and acid
-            element,acid = sign.split(maxsplit=1)
             # figure out the acid amount in case it is set, otherwise 1
-            if '(' in acid:
-                acid,acid_amount = acid[1:].split(')')
-                acid_amount = int(acid_amount)
-            else:
-                acid_amount = 1
+            acid_amount = int(parts['acid_amount'] or 1)
             # create acid and element
-            self.element = Element(element)
+            self.element = Element(parts['element'],False)
             # use cross rule
-            
             self.element.oxidation,acid_oxidation = cross_rule(self.element.amount,acid_amount)
-            self.acid = HydrogenAcid(acid,False, amount=acid_amount,oxidation=acid_oxidation)
+            self.acid = HydrogenAcid(
+                parts['acid'],False, amount=acid_amount,oxidation=acid_oxidation,
+                parts={'hydrogen': parts['acid_hydrogen'], 'element': parts['acid_element'], 'oxygen': parts['acid_oxygen']}
+            )
     
     def tosign(self, oxidation: bool=False):
         return self.element.tosign(oxidation)+self.acid.tosign(oxidation)
@@ -615,43 +1254,207 @@ class SaltHydrate(BaseCompound):
     """
     A salt with attached water.
     """
+    __slots__ = ('salt', 'hydrate')
     typename = 'hydrát soli'
-    re_sign = re.compile(r"^[A-Z][a-z]?\d{0,2} ?\(?[A-Z][a-z]?\d{0,2} ?O\d{0,2}\)?\d{0,2}? . \d{1,2} H2 O$") # `element_sign`+('(')+`element_sign`+'O'x+(')')+'.'+X'H20'
-    re_name = re.compile(r"^[a-z]{2,6}hydrát [^ 0-9]*anu [^ 0-9]*ého$") # X`hydrate`+`element_name`+'an'+`element_name`
-    def __init__(self, sign: str, name: bool=None):
+    re_sign = re.compile(r"^(?P<salt>(?P<salt_element>[A-Z][a-z]?\d{0,2}) ?(?P<salt_bracket>\()?(?P<salt_acid>(?P<salt_acid_element>[A-Z][a-z]?\d{0,2}) ?(?P<salt_acid_oxygen>O\d{0,2}))(?(salt_bracket)\)(?P<salt_acid_amount>\d{1,2}))) \. (?P<hydrate>\d{1,2}) H2 O$") # `element_sign`+('(')+`element_sign`+'O'x+(')')+'.'+X'H20'
+    re_name = re.compile(r"^(?P<hydrate>[a-z]{2,6})hydrát (?P<acid>[^ 0-9]*an)u (?P<element>[^ 0-9]*)ého$") # X`hydrate`+`element_name`+'an'+`element_name`
+    name_keys = frozenset({'hydrát'})
+    sign_keys = frozenset({'hydrate'})
+    spaced_name = True
+    def __init__(self, sign: str, name: bool=None, *, parts: dict=None):
         """
         Takes in a sign and creates an element with it.
         You can specify wheter the element is a name or a sign with `name`.
         If not set, it is automatically figured out with regex.
+        
+        `parts` are the named groups of an already matched regex, used by `recognize`.
         """
         if name is None:
             name = is_compound_name(sign)
+        if parts is None:
+            parts = self._parts(sign, name)
         
         if name:
-            # take out hydrate and salt
-            hydrate,salt_acid,salt_element = sign.split()
             # figure out the hydrate
-            self.hydrate = amount_table.index(hydrate[:-6])
+            self.hydrate = load_amount(parts['hydrate'])
             # turn salt into a correct form and create it
             # for example: uhličitan[u] měďnat[ého]ý
-            self.salt = Salt(salt_acid[:-1]+' '+salt_element[:-3]+'ý',True)
+            salt_acid,salt_element = parts['acid'],parts['element']+'ý'
+            self.salt = Salt(salt_acid+' '+salt_element,True,parts={'acid': salt_acid, 'element': salt_element})
         else:
-            # take out salt and hydrate
-            salt,hydrate = sign.split('.')
             # create salt and figure out hydrate
-            self.salt = Salt(salt.strip(),False)
-            self.hydrate = int(hydrate.replace(' ','')[:-3])
+            self.salt = Salt(parts['salt'],False,parts={
+                'element': parts['salt_element'], 'acid': parts['salt_acid'], 'acid_amount': parts['salt_acid_amount'],
+                'acid_element': parts['salt_acid_element'], 'acid_oxygen': parts['salt_acid_oxygen'],
+            })
+            self.hydrate = int(parts['hydrate'])
 
     def tosign(self, oxidation: bool=False):
         hydrate_s = 'H'+subscript(2, 1 if oxidation else None)+'O'+subscript('', -2 if oxidation else None)
         return self.salt.tosign(oxidation)+' . '+str(self.hydrate)+hydrate_s
     
     def toname(self):
-        salt_acid,salt_element = self.salt.toname().split()
+        salt_acid,salt_element = self.salt.acid.toname(),self.salt.element.toname()
         return amount_table[self.hydrate]+'hydrát '+salt_acid+'u '+salt_element[:-1]+'ého'
 
-# Used for interactive commands
-COMPOUNDS: List[BaseCompound] = [Oxid,Sulfid,Acid,Salt,HydrogenSalt,SaltHydrate]
+# keys of formulas, the first one the fixed sign has is used
+SIGN_KEYS = ('hydrate', 'bracket', 'H', 'formula')
+
+# flags that can be scoped to a part of a regex
+REGEX_FLAGS = ((re.ASCII, 'a'), (re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's'), (re.VERBOSE, 'x'))
+# compiled by `re` the first time a regex might refer to a group by number
+RE_NUMBERED_GROUP = r'(?<!\\)(?:\\\\)*(?:\\[1-9]|\(\?\(\d)'
+
+def check_regex(pattern: re.Pattern):
+    """
+    Raises `ValueError` if a compound regex can't be combined with the others.
+    Group numbers change in the combined regex, so groups can only be referred to by their names.
+    """
+    source = pattern.pattern
+    if any('\\'+digit in source or '(?('+digit in source for digit in '123456789') and re.search(RE_NUMBERED_GROUP, source):
+        raise ValueError(f'Regex "{pattern.pattern}" odkazuje na číslovanou skupinu, použij pojmenovanou.')
+
+class CompoundRegistry(Sequence):
+    """
+    The compound types `recognize` knows, in the order they're tried.
+    
+    Types are indexed by their `name_keys` and `sign_keys`, so an entry is only matched
+    with the regexes of the few types that can match it.
+    A name's keys are its first word, "hydrát" if the first word ends with it and "hydrogen" if it contains it.
+    A formula's key is "hydrate" if it has a dot, "bracket" if it has a bracket,
+    "H" if it starts with hydrogen and "formula" otherwise. "*" matches every entry.
+    Keys are compared case-sensitively, so types whose `re_name` ignores case are tried for every name.
+    
+    New types are added with `register`, which also works as a class decorator.
+    Clear `recognize_cache` after registering if it's enabled.
+    """
+    def __init__(self, compounds: Iterable[Type[BaseCompound]]=()):
+        self._compounds: List[Type[BaseCompound]] = []
+        self._keywords: Set[str] = set()
+        self._names: dict = {}
+        self._signs: dict = {}
+        self.spaced_names = True
+        for compound in compounds:
+            self.register(compound)
+    
+    def __repr__(self):
+        return f'CompoundRegistry<{", ".join(compound.__name__ for compound in self._compounds)}>'
+    
+    def __getitem__(self, i):
+        return self._compounds[i]
+    
+    def __len__(self):
+        return len(self._compounds)
+    
+    def register(self, compound: Type[BaseCompound]=None, *, before: Type[BaseCompound]=None):
+        """
+        Adds a compound type after the others, or before `before` if its regexes overlap with it.
+        Returns the type, so it can be used as a decorator with or without arguments.
+        """
+        if compound is None:
+            return lambda compound: self.register(compound, before=before)
+        unknown = set(compound.sign_keys) - {*SIGN_KEYS, '*'}
+        if unknown:
+            raise ValueError(f'Neznámé klíče vzorců: {", ".join(sorted(unknown))}.')
+        check_regex(compound.re_name)
+        check_regex(compound.re_sign)
+        
+        if compound in self._compounds:
+            self._compounds.remove(compound)
+        i = len(self._compounds) if before is None else self._compounds.index(before)
+        self._compounds.insert(i, compound)
+        self._changed()
+        return compound
+    
+    # code written for the list of compounds keeps working
+    append = register
+    
+    def unregister(self, compound: Type[BaseCompound]):
+        """Removes a compound type."""
+        self._compounds.remove(compound)
+        self._changed()
+    
+    def _changed(self):
+        self._keywords = {key for compound in self._compounds for key in compound.name_keys} - {'*', 'hydrát', 'hydrogen'}
+        # names and formulas can only be told apart by the space if every name has one
+        self.spaced_names = all(compound.spaced_name for compound in self._compounds)
+        self._names = {}
+        self._signs = {}
+    
+    def _name_key(self, name: str) -> Tuple[Optional[str], bool, bool]:
+        word = name.partition(' ')[0]
+        return word if word in self._keywords else None, word.endswith('hydrát'), 'hydrogen' in word
+    
+    def _sign_key(self, sign: str) -> str:
+        if '.' in sign:
+            return 'hydrate'
+        if '(' in sign:
+            return 'bracket'
+        if sign[:1] == 'H' and not sign[1:2].islower():
+            return 'H'
+        return 'formula'
+    
+    def _candidates(self, is_name: bool, key) -> List[Type[BaseCompound]]:
+        if not is_name:
+            return [compound for compound in self._compounds if '*' in compound.sign_keys or key in compound.sign_keys]
+        word, hydrate, hydrogen = key
+        return [
+            compound for compound in self._compounds
+            if '*' in compound.name_keys or compound.re_name.flags & re.IGNORECASE or word in compound.name_keys
+            or (hydrate and 'hydrát' in compound.name_keys) or (hydrogen and 'hydrogen' in compound.name_keys)
+        ]
+    
+    def candidates(self, name: str, sign: str) -> Tuple[List[Type[BaseCompound]], List[Type[BaseCompound]]]:
+        """Returns the types whose name regex and whose sign regex can match the entry."""
+        return self._candidates(True, self._name_key(name)), self._candidates(False, self._sign_key(sign))
+    
+    def _dispatcher(self, is_name: bool, key) -> Tuple[re.Pattern, dict]:
+        """Returns the regex of the candidates for a key, built the first time it's needed."""
+        dispatchers = self._names if is_name else self._signs
+        dispatcher = dispatchers.get(key)
+        if dispatcher is None:
+            dispatcher = dispatchers[key] = build_dispatcher(self._candidates(is_name, key), is_name)
+        return dispatcher
+    
+    def dispatch(self, name: str, sign: str) -> Optional[Tuple[Type[BaseCompound], str, bool, dict]]:
+        """
+        Matches the name and the fixed sign with the regexes of the candidate types.
+        Names and formulas can't match each other's regexes, so the name is tried first.
+        Returns the compound type, the matched string, whether it's a name and the regex parts.
+        """
+        match = None
+        # keys are found inline, this runs for every entry
+        if ' ' in name or not self.spaced_names:
+            word = name.partition(' ')[0]
+            key = (word if word in self._keywords else None, word.endswith('hydrát'), 'hydrogen' in word)
+            regex, groups = self._names.get(key) or self._dispatcher(True, key)
+            match = regex.fullmatch(name)
+        if match is None:
+            regex, groups = self._signs.get(self._sign_key(sign)) or self._dispatcher(False, self._sign_key(sign))
+            match = regex.match(sign)
+            if match is None:
+                return None
+        
+        compound, is_name, part_groups, parts = groups[match.lastgroup]
+        if parts:
+            matched, *values = match.group(*part_groups)
+            parts = dict(zip(parts, values))
+        else:
+            matched, parts = match.group(match.lastgroup), {}
+        return compound, matched, is_name, parts
+    
+    def compile(self):
+        """Builds the regexes of every key, so the first lookups don't have to."""
+        for key in SIGN_KEYS:
+            self._dispatcher(False, key)
+        for word in (*self._keywords, None):
+            for hydrate in (False, True):
+                for hydrogen in (False, True):
+                    self._dispatcher(True, (word, hydrate, hydrogen))
+
+# Used for interactive commands and `recognize`
+COMPOUNDS = CompoundRegistry([Oxid,Sulfid,Acid,Salt,HydrogenSalt,SaltHydrate])
+register_compound = COMPOUNDS.register
 pstring = """
 -- {entry}
 typ sloučeniny: {typename}
@@ -660,38 +1463,1508 @@ vzoreček: {sign}
 vzoreček s oxi.: {oxisign}
 """.strip()
 
+class Token(NamedTuple):
+    """
+    A token of a formula.
+    
+    `kind` is "symbol", "open", "close" or "dot" (hydrate), `position` is its index in the formula.
+    `count` is the amount of a symbol, the multiplier of a closed group or the number of hydrates.
+    """
+    kind: str
+    text: str
+    count: int
+    position: int
+
+# compiled the first time a formula is tokenized, most entries never are
+RE_TOKEN = r"(?P<symbol>[A-Z][a-z]?)(?P<symbol_count>\d*)|(?P<open>\()|(?P<close>\))(?P<close_count>\d*)|(?P<dot>[.·]) *(?P<dot_count>\d*)|(?P<space> +)"
+
+@lru_cache(maxsize=None)
+def _token_regex() -> re.Pattern:
+    return re.compile(RE_TOKEN)
+
+def tokenize_formula(s: str) -> List[Token]:
+    """
+    Splits a formula into tokens in a single pass.
+    Subscript numbers are allowed, spaces are skipped.
+    Raises `FormulaError` with the position of the first wrong character.
+    """
+    s = s.translate(NOR)
+    tokens = []
+    opened = []
+    position = 0
+    match_token = _token_regex().match
+    while position < len(s):
+        match = match_token(s, position)
+        if match is None:
+            char = s[position]
+            if char.isdigit():
+                raise FormulaError(f'Číslo "{char}" nepatří k žádnému prvku.', s, position)
+            raise FormulaError(f'Neočekávaný znak "{char}".', s, position)
+        
+        if match['symbol']:
+            tokens.append(Token('symbol', match['symbol'], int(match['symbol_count'] or 1), position))
+        elif match['open']:
+            opened.append(position)
+            tokens.append(Token('open', '(', 1, position))
+        elif match['close']:
+            if not opened:
+                raise FormulaError('Závorka nebyla otevřena.', s, position)
+            opened.pop()
+            tokens.append(Token('close', ')', int(match['close_count'] or 1), position))
+        elif match['dot']:
+            tokens.append(Token('dot', match['dot'], int(match['dot_count'] or 1), position))
+        position = match.end()
+    
+    if opened:
+        raise FormulaError('Závorka nebyla uzavřena.', s, opened[-1])
+    if not tokens:
+        raise FormulaError('Vzorec je prázdný.', s, 0)
+    return tokens
+
+# a space goes before every uppercase letter, bracket and dot and after every dot
+RE_FIX_SIGN = re.compile(r"(?=[A-Z(.])(?<=[^( ])|(?<=\.)(?=[^ ])")
+
 def fix_compound_sign(s: str) -> str:
     """
     Takes in a sign and adds a space after every element.
     """
+    if s.isascii():
+        return RE_FIX_SIGN.sub(' ', s)
     s = s.translate(NOR)
-    out = ''
+    if not any(map(str.isupper, s)):
+        return RE_FIX_SIGN.sub(' ', s)
+    
+    # other uppercase letters can't be in the regex
+    out = []
+    previous = ''
     for i in s:
-        if out and i not in ' ' and (i.isupper() or i in '(.' or out[-1] in '.') and out[-1] not in '( ':
-            out += ' '+i
+        if previous and i != ' ' and (i.isupper() or i in '(.' or previous == '.') and previous not in '( ':
+            out.append(' ')
+        out.append(i)
+        previous = i
+    return ''.join(out)
+
+class Rejection(NamedTuple):
+    """
+    A lightweight error of an entry that can't be any compound.
+    
+    `code` is "empty", "character", "element", "structure" or "unknown",
+    `position` is the index of the wrong character or None if there isn't one.
+    """
+    code: str
+    position: Optional[int]
+    message: str
+    
+    def __str__(self):
+        return self.message
+
+# characters allowed in a formula, names are the only entries with other characters
+RE_NOT_FORMULA = re.compile(r"[^A-Za-z0-9₀-₉ ().]")
+RE_ASCII_DIGIT = re.compile(r"[0-9]")
+RE_SYMBOL = re.compile(r"[A-Z][a-z]?")
+# a count of zero after a symbol, a bracket or the dot of a hydrate, "10" is a count of ten
+# compiled by `re` the first time an entry has a zero
+RE_ZERO_COUNT = r"(?:[A-Za-z)]|[.·] *)(?P<zero>[0₀]+)(?![0-9₀-₉])"
+
+def prefilter(entry: str) -> Optional[Rejection]:
+    """
+    Quickly rejects entries which can't be any compound, before any regex of a compound type is tried.
+    Returns a `Rejection` or None if the entry might be valid.
+    
+    Names have no digits and if `COMPOUNDS.spaced_names` is set, they all have a space,
+    so other entries must be formulas. Their characters and element symbols are checked against `table`
+    and none of their counts can be zero.
+    """
+    if entry.endswith('\n'):
+        entry = entry[:-1]
+    if not entry or entry.isspace():
+        return Rejection('empty', None, 'Prázdný vstup.')
+    if (' ' in entry or not COMPOUNDS.spaced_names) and RE_ASCII_DIGIT.search(entry) is None:
+        return None
+    
+    bad = RE_NOT_FORMULA.search(entry)
+    if bad is not None:
+        return Rejection('character', bad.start(), f'Neočekávaný znak "{bad[0]}" na pozici {bad.start()+1}.')
+    for symbol in RE_SYMBOL.findall(entry):
+        if symbol not in table:
+            break
+    else:
+        zero = re.search(RE_ZERO_COUNT, entry) if '0' in entry or '₀' in entry else None
+        if zero is None:
+            return None
+        position = zero.start('zero')
+        return Rejection('structure', position, f'Nulový počet na pozici {position+1}.')
+    # only look for the position once something is wrong
+    for symbol in RE_SYMBOL.finditer(entry):
+        if symbol[0] not in table:
+            return Rejection('element', symbol.start(), f'Neznámý prvek "{symbol[0]}" na pozici {symbol.start()+1}.')
+
+class RecognizeCache:
+    """
+    A size bounded LRU cache of recognized compounds.
+    Keyed by the sign fixed with `fix_compound_sign`.
+    
+    Cached compounds are frozen since they're shared between callers.
+    All operations take a lock, so the cache can be shared between threads.
+    """
+    def __init__(self, maxsize: int=1024):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        # imported here, the cache is only used once it's enabled
+        import threading
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def __repr__(self):
+        return f'RecognizeCache<{len(self)}/{self.maxsize} hits={self.hits} misses={self.misses} evictions={self.evictions}>'
+    
+    def __len__(self):
+        return len(self._data)
+    
+    def get(self, key: str):
+        """Returns a cached result or None, counts hits and misses."""
+        with self._lock:
+            result = self._data.get(key)
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._data.move_to_end(key)
+            return result
+    
+    def put(self, key: str, result: tuple):
+        """Saves a result, freezes its compound and evicts the oldest results."""
+        if result[1] is not None:
+            result[1].freeze()
+        with self._lock:
+            self._data[key] = result
+            self._data.move_to_end(key)
+            self._evict()
+    
+    def _evict(self):
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+    
+    def resize(self, maxsize: int):
+        """Changes the maximum size, evicting results that don't fit."""
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+    
+    def clear(self):
+        """Removes all results and resets the statistics."""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+    
+    def stats(self) -> dict:
+        """Returns the cache statistics."""
+        return {
+            'size': len(self),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+recognize_cache: Optional[RecognizeCache] = None
+
+def enable_cache(maxsize: int=1024) -> RecognizeCache:
+    """
+    Puts a `RecognizeCache` in front of `recognize`, or resizes the current one.
+    Returns the cache.
+    """
+    global recognize_cache
+    if recognize_cache is None:
+        recognize_cache = RecognizeCache(maxsize)
+    else:
+        recognize_cache.resize(maxsize)
+    return recognize_cache
+
+def disable_cache():
+    """Removes the cache from `recognize`."""
+    global recognize_cache
+    recognize_cache = None
+
+class Profiler:
+    """
+    Counts calls and cumulative time of every recognition stage per compound class.
+    
+    Stages are "prefilter", "fix_compound_sign", "index", "cache", "dispatch", "construct" and "load_name"
+    while recognizing and "toname", "tosign" and "todict" while rendering.
+    Stages that run before the compound type is known are counted under the recognized class,
+    "unknown" if nothing was recognized.
+    
+    Enable it with `enable_profiler` or use it as a context manager.
+    `hook` is called with `(stage, classname, seconds)` after every stage, to send them elsewhere.
+    Only the current process is profiled, `recognize_parallel` workers are not.
+    """
+    def __init__(self, hook=None):
+        self.hook = hook
+        self._data: dict = {}
+        # imported here, most programs never create a profiler
+        import threading
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._previous: list = []
+    
+    def __repr__(self):
+        return f'Profiler<{len(self._data)} counters>'
+    
+    def __enter__(self) -> 'Profiler':
+        global profiler
+        self._previous.append(profiler)
+        profiler = self
+        return self
+    
+    def __exit__(self, *exc):
+        global profiler
+        profiler = self._previous.pop()
+    
+    @property
+    def current(self) -> Optional[str]:
+        """Name of the class being constructed in this thread."""
+        return getattr(self._local, 'current', None)
+    
+    @current.setter
+    def current(self, classname: Optional[str]):
+        self._local.current = classname
+    
+    def record(self, stage: str, classname: Optional[str], seconds: float):
+        """Adds a call of a stage."""
+        key = (stage, classname or 'unknown')
+        with self._lock:
+            counter = self._data.get(key)
+            if counter is None:
+                self._data[key] = [1, seconds]
+            else:
+                counter[0] += 1
+                counter[1] += seconds
+        if self.hook is not None:
+            self.hook(stage, key[1], seconds)
+    
+    def clear(self):
+        """Resets all counters."""
+        with self._lock:
+            self._data.clear()
+    
+    def rows(self) -> List[dict]:
+        """Returns the counters as a list of `{stage, compound, count, seconds}`, for exporting."""
+        with self._lock:
+            return [
+                {'stage': stage, 'compound': classname, 'count': count, 'seconds': seconds}
+                for (stage, classname), (count, seconds) in sorted(self._data.items())
+            ]
+    
+    def stats(self) -> dict:
+        """Returns the counters as `{stage: {compound: {count, seconds}}}`."""
+        stats = {}
+        for row in self.rows():
+            stats.setdefault(row['stage'], {})[row['compound']] = {'count': row['count'], 'seconds': row['seconds']}
+        return stats
+
+profiler: Optional[Profiler] = None
+
+def enable_profiler(hook=None) -> Profiler:
+    """
+    Starts profiling `recognize` and rendering with a new `Profiler`.
+    Returns the profiler.
+    """
+    global profiler
+    profiler = Profiler(hook)
+    return profiler
+
+def disable_profiler():
+    """Stops profiling."""
+    global profiler
+    profiler = None
+
+def enumerate_names(classes: Iterable[Type[BaseCompound]]=None, elements: Iterable[str]=None) -> Iterator[str]:
+    """
+    Yields the names of every compound the classes can create from the tables.
+    Defaults to all `COMPOUNDS` and every element.
+    
+    Mind that salts combine two elements, so there's a lot of them.
+    Use `elements` to only use some element signs.
+    """
+    classes = COMPOUNDS if classes is None else classes
+    namings = _namings(elements if elements is not None else table)
+    for compound in (Oxid, Sulfid, Acid, Salt, HydrogenSalt, SaltHydrate):
+        if compound in classes:
+            yield from _class_names(compound, namings, namings)
+
+def _namings(elements: Iterable[str]) -> List[str]:
+    """Returns every naming of the element signs."""
+    return [naming for sign in elements for naming in sorted(_get_possible_naming(table[sign]['naming'])) if naming.islower()]
+
+def _class_names(compound: Type[BaseCompound], namings: List[str], cations: List[str], every_prefix: bool=True) -> Iterator[str]:
+    """
+    Yields the names of a compound type made from `namings` with every oxidation.
+    Salts are made from the acids of `namings` and the elements of `cations`.
+    Without `every_prefix` the hydrogen and hydrate prefixes take turns instead of being used with every salt.
+    """
+    oxidations = range(1, len(OXIDATION))
+    if compound in (Oxid, Sulfid):
+        word = 'oxid ' if compound is Oxid else 'sulfid '
+        yield from (word+naming+oxidation_table['element'][o] for naming in namings for o in oxidations)
+        return
+    if compound is Acid:
+        yield from ('kyselina '+naming+oxidation_table['acid'][o] for naming in namings for o in oxidations)
+        return
+    
+    salts = [
+        (naming+oxidation_table['salt'][o], cation+oxidation_table['element'][c])
+        for naming in namings for o in oxidations for cation in cations for c in oxidations
+    ]
+    if compound is Salt:
+        yield from (acid+' '+element for acid,element in salts)
+    elif compound is HydrogenSalt:
+        prefixes = ('',)+tuple(amount_table[2:6])
+        if every_prefix:
+            for hydrogen in prefixes:
+                yield from (hydrogen+'hydrogen'+acid+' '+element for acid,element in salts)
+        else:
+            yield from (prefixes[i%len(prefixes)]+'hydrogen'+acid+' '+element for i,(acid,element) in enumerate(salts))
+    elif compound is SaltHydrate:
+        prefixes = amount_table[1:]
+        if every_prefix:
+            for hydrate in prefixes:
+                yield from (hydrate+'hydrát '+acid+'u '+element[:-1]+'ého' for acid,element in salts)
+        else:
+            yield from (prefixes[i%len(prefixes)]+'hydrát '+acid+'u '+element[:-1]+'ého' for i,(acid,element) in enumerate(salts))
+
+def enumerate_compounds(classes: Iterable[Type[BaseCompound]]=None, elements: Iterable[str]=None) -> Iterator[BaseCompound]:
+    """
+    Yields every compound the classes can create from the tables.
+    Names that can't be turned into a valid compound are skipped.
+    """
+    for name in enumerate_names(classes, elements):
+        compound_type, compound, error = _recognize_uncached(name, fix_compound_sign(name))
+        if compound is not None:
+            try:
+                compound.todict()
+            except Exception:
+                continue
+            yield compound
+
+class QuizItem(NamedTuple):
+    """A question generated by `CompoundGenerator`, either a name or a sign of the compound."""
+    question: str
+    answer: str
+    compound: BaseCompound
+
+class _Permutation:
+    """
+    A pseudo-random permutation of `range(size)` which doesn't have to be stored.
+    A feistel network on the next even power of two, numbers outside of the range are walked through again.
+    """
+    def __init__(self, size: int, rnd):
+        self.size = size
+        bits = max(2, (size-1).bit_length())
+        self.half = (bits+1)//2
+        self.mask = (1<<self.half)-1
+        self.keys = [rnd.getrandbits(64) for _ in range(4)]
+    
+    def __getitem__(self, i: int) -> int:
+        while True:
+            left, right = i >> self.half, i & self.mask
+            for key in self.keys:
+                left, right = right, left ^ ((((right ^ key) * 0x9E3779B97F4A7C15) >> 17) & self.mask)
+            i = (left << self.half) | right
+            if i < self.size:
+                return i
+
+def _has_empty_part(compound: BaseCompound) -> bool:
+    """Whether the compound or any of its parts has an amount of zero, like the H₀ of "kyselina rhodistá"."""
+    if compound.amount == 0:
+        return True
+    return any(
+        isinstance(value, BaseCompound) and _has_empty_part(value)
+        for value in (getattr(compound, attr, None) for attr in _slot_names(type(compound)))
+    )
+
+class CompoundGenerator:
+    """
+    Generates random compounds from the tables, for practicing and quizzes.
+    
+    Compounds are created from their names, so only valid combinations of elements,
+    oxidations and hydrates are generated. Every element uses only its naming from `table`,
+    so no compound is generated twice; a few different compounds do share a sign though.
+    Hydrogen is never the cation of a salt, those are acids. Names that make a compound with zero atoms
+    of some part, or that `recognize` doesn't turn back into the same name and sign, are skipped.
+    
+    `weights` is a dict of `{compound class: weight}`, by default every class of `GENERATOR_CLASSES` has the same weight.
+    The same `seed` always generates the same compounds.
+    """
+    def __init__(self, seed: int=None, weights: Mapping[Type[BaseCompound], float]=None, elements: Iterable[str]=None):
+        # imported here, it's only needed for generating
+        import random
+        self.random = random.Random(seed)
+        weights = weights if weights is not None else dict.fromkeys(GENERATOR_CLASSES, 1)
+        
+        data = [table[sign] for sign in elements] if elements is not None else list(table.values())
+        data = [d for d in data if d['naming'].islower()]
+        namings = [d['naming'] for d in data]
+        oxidations = range(1, len(OXIDATION))
+        self._element_names = [naming+oxidation_table['element'][o] for naming in namings for o in oxidations]
+        self._cation_names = [d['naming']+oxidation_table['element'][o] for d in data if d['sign'] != 'H' for o in oxidations]
+        self._acid_names = [naming+oxidation_table['acid'][o] for naming in namings for o in oxidations]
+        self._salt_names = [naming+oxidation_table['salt'][o] for naming in namings for o in oxidations]
+        
+        self._classes = []
+        for compound, weight in weights.items():
+            if compound not in GENERATOR_CLASSES:
+                raise ValueError(f'Typ sloučeniny "{compound.typename}" nelze generovat.')
+            size = self._size(compound)
+            if weight > 0 and size > 0:
+                self._classes.append([compound, weight, _Permutation(size, self.random), 0])
+        self._total = sum(state[2].size for state in self._classes)
+    
+    def __repr__(self):
+        return f'CompoundGenerator<{len(self)} compounds>'
+    
+    def __len__(self):
+        """Number of names compounds are generated from, the skipped ones included."""
+        return self._total
+    
+    def _size(self, compound: Type[BaseCompound]) -> int:
+        elements, cations, salts = len(self._element_names), len(self._cation_names), len(self._salt_names)
+        if compound in (Oxid, Sulfid):
+            return elements
+        elif compound is Acid:
+            return len(self._acid_names)
+        elif compound is Salt:
+            return salts*cations
+        elif compound is HydrogenSalt:
+            return len(HYDROGEN_PREFIXES)*salts*cations
+        return (len(amount_table)-1)*salts*cations
+    
+    def _name(self, compound: Type[BaseCompound], i: int) -> str:
+        """Returns the i-th name of a class."""
+        if compound is Oxid:
+            return 'oxid '+self._element_names[i]
+        elif compound is Sulfid:
+            return 'sulfid '+self._element_names[i]
+        elif compound is Acid:
+            return 'kyselina '+self._acid_names[i]
+        
+        i, element = divmod(i, len(self._cation_names))
+        i, acid = divmod(i, len(self._salt_names))
+        element, acid = self._cation_names[element], self._salt_names[acid]
+        if compound is Salt:
+            return acid+' '+element
+        elif compound is HydrogenSalt:
+            return HYDROGEN_PREFIXES[i]+'hydrogen'+acid+' '+element
+        return amount_table[i+1]+'hydrát '+acid+'u '+element[:-1]+'ého'
+    
+    def compounds(self, count: int=None) -> Iterator[BaseCompound]:
+        """
+        Yields up to `count` random compounds, or until all of them were generated.
+        Classes are picked by their weight.
+        """
+        classes = self._classes
+        generated = 0
+        while classes and (count is None or generated < count):
+            state = self.random.choices(classes, [state[1] for state in classes])[0] if len(classes) > 1 else classes[0]
+            compound, weight, permutation, used = state
+            state[3] += 1
+            if state[3] >= permutation.size:
+                classes.remove(state)
+            
+            name = self._name(compound, permutation[used])
+            try:
+                result = compound(name, True)
+            except NazvosloviException:
+                continue
+            if _has_empty_part(result) or _roundtrip(name) is not None:
+                continue
+            generated += 1
+            yield result
+    
+    def quiz(self, count: int=None, directions: Tuple[str, ...]=('name', 'sign')) -> Iterator[QuizItem]:
+        """
+        Yields up to `count` questions with their answers.
+        The question is picked from `directions`, "name" asks for the name, "sign" for the sign.
+        """
+        choice = self.random.choice
+        for compound in self.compounds(count):
+            if choice(directions) == 'name':
+                yield QuizItem(compound.sign, compound.name, compound)
+            else:
+                yield QuizItem(compound.name, compound.sign, compound)
+
+GENERATOR_CLASSES = (Oxid, Sulfid, Acid, Salt, HydrogenSalt, SaltHydrate)
+HYDROGEN_PREFIXES = ('',)+tuple(amount_table[2:6])
+
+class CompoundIndex:
+    """
+    A precomputed index of compounds, both by name and by the fixed sign.
+    Every entry is the result `recognize` would return, so the index never changes the results.
+    
+    Can be saved and loaded, it's ignored once the tables change.
+    """
+    def __init__(self):
+        self._data: dict = {}
+    
+    def __repr__(self):
+        return f'CompoundIndex<{len(self)} entries>'
+    
+    def __len__(self):
+        return len(self._data)
+    
+    def _add(self, entry: str, is_sign: bool=False) -> Optional[BaseCompound]:
+        """
+        Indexes the result of a single entry if it's valid.
+        Names are indexed as they are, signs by their fixed form and as written without subscripts.
+        """
+        sign = fix_compound_sign(entry)
+        key = sign if is_sign else entry
+        if key in self._data:
+            return None
+        compound_type, compound, error = _recognize_uncached(entry, sign)
+        if compound is None:
+            return None
+        try:
+            compound.todict()
+        except Exception:
+            return None
+        compound.freeze()
+        self._data[key] = (compound_type, compound, None)
+        if is_sign:
+            for raw in (entry, entry.translate(NOR)):
+                self._data.setdefault(raw, self._data[key])
+        return compound
+    
+    def add(self, name: str):
+        """Indexes a compound's name, its rendered name and its sign."""
+        compound = self._add(name)
+        if compound is not None:
+            self._add(compound.name)
+            self._add(compound.sign, True)
+    
+    def get(self, entry: str) -> Optional[tuple]:
+        """Returns the result for a name or a fixed sign, or None."""
+        return self._data.get(entry)
+    
+    @classmethod
+    def build(cls, classes: Iterable[Type[BaseCompound]]=None, elements: Iterable[str]=None) -> 'CompoundIndex':
+        """
+        Builds an index of every compound from `enumerate_names`.
+        Defaults to `INDEX_CLASSES`.
+        """
+        index = cls()
+        for name in enumerate_names(INDEX_CLASSES if classes is None else classes, elements):
+            index.add(name)
+        return index
+    
+    def save(self, path: str=None):
+        """Saves the index with pickle, together with the stamps of the tables and of the code."""
+        # imported here since only the index needs it
+        import pickle
+        saved = {'version': INDEX_VERSION, 'stamps': _table_stamps(), 'code': _code_stamp(), 'data': self._data}
+        with open(path or INDEX_PATH, 'wb') as file:
+            pickle.dump(saved, file, pickle.HIGHEST_PROTOCOL)
+    
+    @classmethod
+    def load(cls, path: str=None) -> Optional['CompoundIndex']:
+        """Loads a saved index, returns None if it doesn't exist or the tables or this file changed."""
+        import pickle
+        try:
+            with open(path or INDEX_PATH, 'rb') as file:
+                saved = pickle.load(file)
+            if saved['version'] != INDEX_VERSION or saved['stamps'] != _table_stamps() or saved['code'] != _code_stamp():
+                return None
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, KeyError, TypeError):
+            return None
+        index = cls()
+        index._data = saved['data']
+        return index
+
+INDEX_CLASSES = (Oxid, Sulfid, Acid)
+INDEX_PATH = os.path.join(TABLES_DIR, 'index.pickle')
+INDEX_VERSION = 1
+compound_index: Optional[CompoundIndex] = None
+
+def enable_index(index: CompoundIndex=None) -> CompoundIndex:
+    """
+    Puts a `CompoundIndex` in front of `recognize`.
+    If no index is given, the saved one is loaded, or built and saved if it's missing or old.
+    Returns the index.
+    """
+    global compound_index
+    if index is None:
+        index = CompoundIndex.load()
+    if index is None:
+        index = CompoundIndex.build()
+        try:
+            index.save()
+        except OSError:
+            pass
+    compound_index = index
+    return index
+
+def disable_index():
+    """Removes the index from `recognize`."""
+    global compound_index
+    compound_index = None
+
+def _recognize(s: str) -> Tuple[Optional[Type[BaseCompound]], Optional[BaseCompound], Union[Exception, Rejection, None]]:
+    """
+    Recognizes a compound and returns its type, the compound and an error.
+    The type is None if the compound was not recognized, the error is a `Rejection` if `prefilter` rejected it.
+    Uses `compound_index` and `recognize_cache` if they're enabled.
+    """
+    if profiler is not None:
+        return _recognize_profiled(s, profiler)
+    
+    index = compound_index
+    if index is not None:
+        result = index.get(s)
+        if result is not None:
+            return result
+    
+    rejection = prefilter(s)
+    if rejection is not None:
+        return None, None, rejection
+    
+    sign = fix_compound_sign(s)
+    if index is not None:
+        result = index.get(sign)
+        if result is not None:
+            return result
+    
+    cache = recognize_cache
+    if cache is None:
+        return _recognize_uncached(s, sign)
+    
+    result = cache.get(sign)
+    if result is None:
+        result = _recognize_uncached(s, sign)
+        cache.put(sign, result)
+    return result
+
+def _regex_body(pattern: re.Pattern, prefix: str) -> str:
+    """
+    Takes a compound regex and returns it without anchors and with prefixed group names.
+    Its flags are kept for just this part of the combined regex.
+    """
+    body = re.sub(r'^\(\?[aiLmsux]+\)', '', pattern.pattern)
+    if pattern.flags & re.VERBOSE:
+        body = body.strip()
+    if body.startswith('^'):
+        body = body[1:]
+    if body.endswith('$') and not body.endswith('\\$'):
+        body = body[:-1]
+    body = re.sub(r'\(\?P<(\w+)>', lambda m: f'(?P<{prefix}{m[1]}>', body)
+    body = re.sub(r'\(\?P=(\w+)\)', lambda m: f'(?P={prefix}{m[1]})', body)
+    body = re.sub(r'\(\?\((\w+)\)', lambda m: f'(?({prefix}{m[1]})', body)
+    flags = ''.join(letter for flag,letter in REGEX_FLAGS if pattern.flags & flag)
+    if flags:
+        # a comment of a verbose regex would hide the closing bracket
+        body = f'(?{flags}:{body}\n)' if 'x' in flags else f'(?{flags}:{body})'
+    return body
+
+def build_dispatcher(compounds: Iterable[Type[BaseCompound]], is_name: bool) -> Tuple[re.Pattern, dict]:
+    """
+    Combines `re_name` or `re_sign` of the compounds into a single regex.
+    Names are matched with `fullmatch`, fixed signs with `match`.
+    
+    Returns the regex and a dict of `{group: (compound, is_name, (group, *part_groups), parts)}`.
+    Alternatives are in the same order as the compounds.
+    """
+    alternatives = []
+    groups = {}
+    for i,compound in enumerate(compounds):
+        pattern = compound.re_name if is_name else compound.re_sign
+        group = f'c{i}'
+        prefix = group+'_'
+        alternatives.append(f'(?P<{group}>{_regex_body(pattern, prefix)})')
+        parts = tuple(pattern.groupindex)
+        groups[group] = (compound, is_name, (group, *(prefix+part for part in parts)), parts)
+    
+    if not alternatives:
+        # never matches
+        return re.compile(r'(?!)'), groups
+    return re.compile(f'(?:{"|".join(alternatives)})' + ('' if is_name else '$')), groups
+
+def _recognize_uncached(name: str, sign: str) -> Tuple[Optional[Type[BaseCompound]], Optional[BaseCompound], Optional[Exception]]:
+    """
+    Matches the name and the fixed sign with the dispatcher and creates the compound.
+    """
+    dispatched = _dispatch(name, sign)
+    if dispatched is None:
+        return None, None, None
+    compound, sign, is_name, parts = dispatched
+    try:
+        return compound, compound(sign, is_name, parts=parts), None
+    except Exception as e:
+        return compound, None, e
+
+def _dispatch(name: str, sign: str) -> Optional[Tuple[Type[BaseCompound], str, bool, dict]]:
+    """
+    Matches the name and the fixed sign with the regexes of `COMPOUNDS`.
+    Returns the compound type, the matched string, whether it's a name and the regex parts.
+    """
+    if name.endswith('\n'):
+        # same as `$` in the compound regexes
+        name = name[:-1]
+    return COMPOUNDS.dispatch(name, sign)
+
+def _recognize_profiled(s: str, prof: Profiler) -> Tuple[Optional[Type[BaseCompound]], Optional[BaseCompound], Union[Exception, Rejection, None]]:
+    """
+    Same as `_recognize`, but records every stage in `prof`.
+    """
+    timings = []
+    def timed(stage, function, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            timings.append((stage, time.perf_counter()-start))
+    
+    result = None
+    index = compound_index
+    if index is not None:
+        result = timed('index', index.get, s)
+    
+    if result is None:
+        rejection = timed('prefilter', prefilter, s)
+        if rejection is not None:
+            for stage, seconds in timings:
+                prof.record(stage, None, seconds)
+            return None, None, rejection
+        sign = timed('fix_compound_sign', fix_compound_sign, s)
+        if index is not None:
+            result = timed('index', index.get, sign)
+    
+    cache = recognize_cache
+    if result is None and cache is not None:
+        result = timed('cache', cache.get, sign)
+    
+    if result is None:
+        dispatched = timed('dispatch', _dispatch, s, sign)
+        if dispatched is None:
+            result = None, None, None
         else:
-            out += i
-    return out
+            compound, sign_, is_name, parts = dispatched
+            prof.current = compound.__name__
+            try:
+                result = compound, timed('construct', compound, sign_, is_name, parts=parts), None
+            except Exception as e:
+                result = compound, None, e
+            finally:
+                prof.current = None
+        if cache is not None:
+            cache.put(sign, result)
     
+    classname = result[0].__name__ if result[0] is not None else None
+    for stage, seconds in timings:
+        prof.record(stage, classname, seconds)
+    return result
 
 def recognize(s: str) -> Union[BaseCompound,None,NazvosloviException]:
     """
     Recognizes a regural experession and returns a Compound class.
+    
+    Nothing shared is changed while recognizing,
+    so this can be called from multiple threads without any locks.
+    """
+    compound_type, compound, error = _recognize(s)
+    if isinstance(error, NazvosloviException):
+        return error
+    elif isinstance(error, Rejection):
+        return None
+    elif error is not None:
+        print('Sloučenina rozpoznána, ale je chybná:',error)
+        return None
+    return compound
+
+class Recognition(NamedTuple):
+    """
+    A result of `recognize_many`.
+    Has the entry, the recognized compound type and either the compound or an error.
     """
-    name = s
-    sign = fix_compound_sign(s.translate(NOR))
+    entry: str
+    type: Optional[Type[BaseCompound]]
+    compound: Optional[BaseCompound]
+    error: Union[Exception, Rejection, None]
+    
+    @property
+    def ok(self) -> bool:
+        """Whether the compound was recognized without an error."""
+        return self.error is None
+    
+    @property
+    def status(self) -> str:
+        """Either "ok", "unknown" if the type wasn't recognized or "error"."""
+        if self.error is None:
+            return 'ok'
+        elif self.type is None and isinstance(self.error, (Rejection, IncorrectFormat)):
+            return 'unknown'
+        return 'error'
+    
+    def todict(self) -> dict:
+        """
+        Returns the compound's `todict` with the entry and status.
+        Errors are returned as a message, even if they happen while formatting,
+        rejected entries also have the code and position of the `Rejection`.
+        """
+        if self.error is None:
+            try:
+                return self.compound.todict(entry=self.entry, status='ok')
+            except Exception as e:
+                error = e
+            status = 'error'
+        else:
+            error = self.error
+            status = self.status
+        result = {
+            'entry': self.entry,
+            'status': status,
+            'typename': self.type.typename if self.type else None,
+            'error': str(error),
+        }
+        if isinstance(error, Rejection):
+            result['code'] = error.code
+            result['position'] = error.position
+        return result
+
+def _unrecognized_error(entry: str) -> Rejection:
+    """
+    Returns the rejection of an entry whose type wasn't recognized.
+    Names are lowercase, so for formulas it points at the wrong character if there is one.
+    """
+    if entry[:1].isupper() or entry[:1] == '(':
+        try:
+            tokenize_formula(entry)
+        except FormulaError as e:
+            return Rejection('structure', e.position, str(e))
+    return Rejection('unknown', None, f'Typ sloučeniny "{entry}" nebyl rozpoznán.')
+
+def recognize_many(entries: Iterable[str], window: int=1024) -> Iterator[Recognition]:
+    """
+    Recognizes compounds one by one and yields a `Recognition` for each, in order.
+    Unrecognized compounds get a `Rejection` as their error.
+    
+    The last `window` distinct entries are remembered so duplicates aren't recognized again.
+    Duplicates share the same compound object.
+    """
+    recent: OrderedDict = OrderedDict()
+    for entry in entries:
+        entry = entry.strip()
+        result = recent.get(entry)
+        if result is not None:
+            recent.move_to_end(entry)
+            yield result
+            continue
+        
+        compound_type, compound, error = _recognize(entry)
+        if compound_type is None and error is None:
+            error = _unrecognized_error(entry)
+        result = Recognition(entry, compound_type, compound, error)
+        
+        if window > 0:
+            recent[entry] = result
+            if len(recent) > window:
+                recent.popitem(last=False)
+        yield result
+
+# bulk recognition: compounds of the same type are solved together, column by column
+
+def _element_prototypes(values: Iterable[str], name: bool, **kwargs) -> dict:
+    """
+    Creates an `Element` for every distinct sign or name, None if it can't be created.
+    Bulk solvers only copy their data, so every element is looked up once per batch.
+    """
+    prototypes = {}
+    for value in set(values):
+        try:
+            prototypes[value] = Element(value, name, **kwargs)
+        except Exception:
+            prototypes[value] = None
+    return prototypes
+
+def _new_element(data: Mapping, naming: str, oxidation: int, amount: int) -> Element:
+    element = Element.__new__(Element)
+    element._data = data
+    element.naming = naming
+    element.oxidation = oxidation
+    element.amount = amount
+    return element
+
+def _copy_element(prototype: Element, oxidation: int, amount: int) -> Element:
+    return _new_element(prototype._data, prototype.naming, oxidation, amount)
+
+def _bulk_factor(xs: List[int], ys: List[int]) -> Tuple[List[int], List[int]]:
+    """`factor` of whole columns, pairs with a zero gcd must be filtered out before."""
+    gs = list(map(gcd, xs, ys))
+    return [x//g for x,g in zip(xs,gs)], [y//g for y,g in zip(ys,gs)]
+
+def _bulk_cross_rule(xs: List[int], ys: List[int]) -> Tuple[List[int], List[int]]:
+    """`cross_rule` of whole columns, pairs with a zero gcd must be filtered out before."""
+    xs, ys = _bulk_factor(xs, ys)
+    return [y if y>=0 else -y for y in ys], [-x if y>=0 else x for x,y in zip(xs,ys)]
+
+def _bulk_single_element(compound: Type[SingleElementCompound], is_name: bool, parts: List[dict]) -> list:
+    """Solves oxids and sulfids, returns a compound or None for each parts."""
+    results = [None]*len(parts)
+    main_data = table[compound.main_sign]
+    main_oxidation = compound.main_oxidation
+    
+    if is_name:
+        alts = _element_prototypes((p['alt'] for p in parts), True)
+        rows = [(i, alts[p['alt']]) for i,p in enumerate(parts) if alts[p['alt']] is not None]
+        main_amounts, alt_amounts = _bulk_cross_rule([main_oxidation]*len(rows), [alt.oxidation for i,alt in rows])
+        for (i,alt), main_amount, alt_amount in zip(rows, main_amounts, alt_amounts):
+            result = compound.__new__(compound)
+            result.main = _new_element(main_data, main_data['naming'], main_oxidation, main_amount)
+            result.alt = _copy_element(alt, alt.oxidation, alt_amount)
+            results[i] = result
+        return results
+    
+    mains = _element_prototypes((p['main'] for p in parts), False)
+    alts = _element_prototypes((p['alt'] for p in parts), False)
+    rows = []
+    for i,p in enumerate(parts):
+        main, alt = mains[p['main']], alts[p['alt']]
+        # zero amounts are left to the scalar class, which raises the right error
+        if main is not None and alt is not None and alt.amount != 0:
+            rows.append((i, main, alt))
+    alt_oxidations = [-(main_oxidation*main.amount)//alt.amount for i,main,alt in rows]
+    main_amounts, alt_amounts = _bulk_factor([main.amount for i,main,alt in rows], [alt.amount for i,main,alt in rows])
+    for (i,main,alt), alt_oxidation, main_amount, alt_amount in zip(rows, alt_oxidations, main_amounts, alt_amounts):
+        result = compound.__new__(compound)
+        result.main = _copy_element(main, main_oxidation, main_amount)
+        result.alt = _copy_element(alt, alt_oxidation, alt_amount)
+        results[i] = result
+    return results
+
+def _bulk_acid(compound: Type[Acid], is_name: bool, parts: List[dict]) -> list:
+    """Solves acids, returns a compound or None for each parts."""
+    results = [None]*len(parts)
+    hydrogen_data, oxygen_data = table['H'], table['O']
+    
+    if is_name:
+        elements = _element_prototypes((p['element'] for p in parts), True, tablekey='acid')
+        rows = []
+        for i,p in enumerate(parts):
+            element = elements[p['element']]
+            if element is None or (p['hydrogen'] is not None and p['hydrogen'] not in amount_prefixes):
+                continue
+            rows.append((i, element, amount_prefixes[p['hydrogen']] if p['hydrogen'] is not None else None))
+        hydrogens = [
+            (2 if element.oxidation%2 == 0 else 0) if hydrogen is None else hydrogen
+            for i,element,hydrogen in rows
+        ]
+        oxygens = [(hydrogen+element.oxidation)//2 for (i,element,_),hydrogen in zip(rows, hydrogens)]
+        for (i,element,_), hydrogen, oxygen in zip(rows, hydrogens, oxygens):
+            result = compound.__new__(compound)
+            result.element = _copy_element(element, element.oxidation, element.amount)
+            result.hydrogen = _new_element(hydrogen_data, hydrogen_data['naming'], 1, hydrogen)
+            result.oxygen = _new_element(oxygen_data, oxygen_data['naming'], -2, oxygen)
+            results[i] = result
+        return results
+    
+    hydrogens = _element_prototypes((p['hydrogen'] for p in parts), False)
+    elements = _element_prototypes((p['element'] for p in parts), False)
+    oxygens = _element_prototypes((p['oxygen'] for p in parts), False)
+    rows = [(i, hydrogens[p['hydrogen']], elements[p['element']], oxygens[p['oxygen']]) for i,p in enumerate(parts)]
+    rows = [row for row in rows if None not in row]
+    oxidations = [2*oxygen.amount-hydrogen.amount for i,hydrogen,element,oxygen in rows]
+    for (i,hydrogen,element,oxygen), oxidation in zip(rows, oxidations):
+        result = compound.__new__(compound)
+        result.hydrogen = _copy_element(hydrogen, 1, hydrogen.amount)
+        result.oxygen = _copy_element(oxygen, -2, oxygen.amount)
+        result.element = _copy_element(element, oxidation, element.amount)
+        results[i] = result
+    return results
+
+def _bulk_salt(compound: Type[Salt], is_name: bool, parts: List[dict]) -> list:
+    """Solves salts, returns a compound or None for each parts."""
+    results = [None]*len(parts)
+    
+    if is_name:
+        elements = _element_prototypes((p['element'] for p in parts), True)
+        acids = {}
+        for acid in set(p['acid'] for p in parts):
+            try:
+                acids[acid] = SaltAcid(acid, True)
+            except Exception:
+                acids[acid] = None
+        rows = [(i, elements[p['element']], acids[p['acid']]) for i,p in enumerate(parts)]
+        rows = [row for row in rows if None not in row]
+        element_amounts, acid_amounts = _bulk_cross_rule(
+            [element.oxidation for i,element,acid in rows], [acid.oxidation for i,element,acid in rows]
+        )
+        for (i,element,acid), element_amount, acid_amount in zip(rows, element_amounts, acid_amounts):
+            salt_acid = SaltAcid.__new__(SaltAcid)
+            salt_acid.oxidation = acid.oxidation
+            salt_acid.amount = acid_amount
+            salt_acid.element = _copy_element(acid.element, acid.element.oxidation, acid.element.amount)
+            salt_acid.oxygen = _copy_element(acid.oxygen, acid.oxygen.oxidation, acid.oxygen.amount)
+            result = compound.__new__(compound)
+            result.element = _copy_element(element, element.oxidation, element_amount)
+            result.acid = salt_acid
+            results[i] = result
+        return results
+    
+    elements = _element_prototypes((p['element'] for p in parts), False)
+    acid_elements = _element_prototypes((p['acid_element'] for p in parts), False)
+    oxygens = _element_prototypes((p['acid_oxygen'] for p in parts), False)
+    rows = []
+    for i,p in enumerate(parts):
+        row = (i, elements[p['element']], acid_elements[p['acid_element']], oxygens[p['acid_oxygen']], int(p['acid_amount'] or 1))
+        if None not in row and (row[1].amount or row[4]):
+            rows.append(row)
+    element_oxidations, acid_oxidations = _bulk_cross_rule(
+        [element.amount for i,element,acid_element,oxygen,acid_amount in rows],
+        [acid_amount for i,element,acid_element,oxygen,acid_amount in rows]
+    )
+    for (i,element,acid_element,oxygen,acid_amount), element_oxidation, acid_oxidation in zip(rows, element_oxidations, acid_oxidations):
+        salt_acid = SaltAcid.__new__(SaltAcid)
+        salt_acid.oxidation = acid_oxidation
+        salt_acid.amount = acid_amount
+        salt_acid.oxygen = _copy_element(oxygen, -2, oxygen.amount)
+        salt_acid.element = _copy_element(acid_element, 2*oxygen.amount+acid_oxidation, acid_element.amount)
+        result = compound.__new__(compound)
+        result.element = _copy_element(element, element_oxidation, element.amount)
+        result.acid = salt_acid
+        results[i] = result
+    return results
+
+BULK_SOLVERS = {
+    Oxid: _bulk_single_element,
+    Sulfid: _bulk_single_element,
+    Acid: _bulk_acid,
+    Salt: _bulk_salt,
+}
+
+def recognize_bulk(entries: Iterable[str]) -> List[Recognition]:
+    """
+    Recognizes a batch of compounds and returns a `Recognition` for each, in order.
+    The results are the same as from `recognize_many`.
+    
+    Entries are grouped by compound type and the amounts and oxidations of each group
+    are solved together by `BULK_SOLVERS`, every distinct element is looked up once.
+    Types without a solver and entries a solver can't handle are created one by one.
+    The cache and the index are not used.
+    """
+    entries = [entry.strip() for entry in entries]
+    unique = {}
+    groups = {}
+    for entry in entries:
+        if entry in unique:
+            continue
+        rejection = prefilter(entry)
+        if rejection is not None:
+            unique[entry] = Recognition(entry, None, None, rejection)
+            continue
+        dispatched = _dispatch(entry, fix_compound_sign(entry))
+        if dispatched is None:
+            unique[entry] = Recognition(entry, None, None, _unrecognized_error(entry))
+            continue
+        compound, sign, is_name, parts = dispatched
+        unique[entry] = None
+        groups.setdefault((compound, is_name), []).append((entry, sign, parts))
+    
+    for (compound, is_name), group in groups.items():
+        solver = BULK_SOLVERS.get(compound)
+        solved = solver(compound, is_name, [parts for entry,sign,parts in group]) if solver else [None]*len(group)
+        for (entry, sign, parts), result in zip(group, solved):
+            if result is not None:
+                unique[entry] = Recognition(entry, compound, result, None)
+                continue
+            try:
+                unique[entry] = Recognition(entry, compound, compound(sign, is_name, parts=parts), None)
+            except Exception as e:
+                unique[entry] = Recognition(entry, compound, None, e)
+    
+    return [unique[entry] for entry in entries]
+
+class BatchStats:
+    """
+    Statistics of a batch recognized by `recognize_parallel`.
+    """
+    def __init__(self):
+        self.entries = 0
+        self.errors = 0
+        self.chunks = 0
+        self.failed_chunks = 0
+        self.seconds = 0.0
+    
+    def __repr__(self):
+        return f'BatchStats<{self.entries} entries, {self.errors} errors, {self.seconds:.2f}s, {self.throughput:.0f}/s>'
+    
+    @property
+    def throughput(self) -> float:
+        """Entries per second."""
+        return self.entries/self.seconds if self.seconds else 0.0
+
+def _init_worker():
+    """Prepares a worker process so the first chunk doesn't pay for compiling the dispatcher."""
+    COMPOUNDS.compile()
+
+def _recognize_chunk(entries: List[str], todict: bool) -> list:
+    """Recognizes a chunk of entries in a worker process."""
+    results = list(recognize_many(entries))
+    if todict:
+        return [result.todict() for result in results]
+    return results
+
+def _failed_chunk(entries: List[str], error: Exception, todict: bool) -> list:
+    """Creates results for a chunk whose worker failed."""
+    results = [Recognition(entry.strip(), None, None, error) for entry in entries]
+    if todict:
+        return [result.todict() for result in results]
+    return results
+
+def recognize_parallel(
+    entries: Iterable[str],
+    jobs: int=None,
+    chunksize: int=1000,
+    *,
+    todict: bool=False,
+    stats: BatchStats=None
+) -> Iterator[Union[Recognition,dict]]:
+    """
+    Recognizes compounds in a pool of `jobs` processes, in chunks of `chunksize` entries.
+    Yields a `Recognition` for each entry in the same order as the entries,
+    or its `todict` if `todict` is set, which is cheaper to send between processes.
+    
+    If a worker fails, every entry of its chunk gets the error instead.
+    Pass in a `BatchStats` to get the throughput.
+    """
+    stats = stats if stats is not None else BatchStats()
+    start = time.perf_counter()
+    entries = iter(entries)
+    pending: deque = deque()
+    
+    def collect(chunk, future) -> list:
+        stats.chunks += 1
+        try:
+            results = future.result()
+        except Exception as e:
+            stats.failed_chunks += 1
+            results = _failed_chunk(chunk, e, todict)
+        stats.entries += len(results)
+        if todict:
+            stats.errors += sum(result['status'] != 'ok' for result in results)
+        else:
+            stats.errors += sum(not result.ok for result in results)
+        stats.seconds = time.perf_counter()-start
+        return results
+    
+    jobs = jobs or os.cpu_count() or 1
+    # keep only a few chunks in flight so memory doesn't grow with the input
+    max_pending = 2*jobs
+    
+    # imported here since it's slow to import and only needed for batches
+    from concurrent.futures import Future, ProcessPoolExecutor
+    
+    with ProcessPoolExecutor(jobs, initializer=_init_worker) as executor:
+        while True:
+            chunk = list(islice(entries, chunksize))
+            if chunk:
+                try:
+                    future = executor.submit(_recognize_chunk, chunk, todict)
+                except Exception as e:
+                    # the pool is broken, every other chunk fails the same way
+                    future = Future()
+                    future.set_exception(e)
+                pending.append((chunk, future))
+            if pending and (not chunk or len(pending) >= max_pending):
+                yield from collect(*pending.popleft())
+            if not chunk and not pending:
+                break
+
+# round trip verification
+
+VERIFY_PARTNERS = ('H', 'Na', 'Ca', 'Fe', 'S', 'N')
+VERIFY_KINDS = ('recognize', 'sign', 'type', 'name', 'formula')
+
+class VerifyReport:
+    """
+    Results of `verify_roundtrips`.
+    
+    `counts` is `{(classname, element): {kind: mismatches}}` with the kinds of `VERIFY_KINDS`,
+    `samples` has a few descriptions of every kind of mismatch of every group.
+    """
+    def __init__(self):
+        self.checked = 0
+        self.units = 0
+        self.seconds = 0.0
+        self.counts: dict = {}
+        self.samples: dict = {}
+    
+    def __repr__(self):
+        return f'VerifyReport<{self.checked} checked, {self.mismatches} mismatches, {self.seconds:.2f}s, {self.throughput:.0f}/s>'
+    
+    @property
+    def mismatches(self) -> int:
+        return sum(sum(kinds.values()) for kinds in self.counts.values())
+    
+    @property
+    def throughput(self) -> float:
+        """Checked compounds per second."""
+        return self.checked/self.seconds if self.seconds else 0.0
+    
+    def by_kind(self) -> dict:
+        """Returns `{kind: mismatches}` of all groups."""
+        total = dict.fromkeys(VERIFY_KINDS, 0)
+        for kinds in self.counts.values():
+            for kind,count in kinds.items():
+                total[kind] += count
+        return total
+    
+    def add(self, classname: str, element: str, checked: int, counts: dict, samples: list):
+        """Adds the results of a single class and element."""
+        self.checked += checked
+        self.units += 1
+        if counts:
+            self.counts[classname, element] = counts
+            self.samples[classname, element] = samples
+    
+    def format(self) -> str:
+        """Returns the mismatches grouped by class and element, with a few samples of each."""
+        lines = []
+        for (classname, element), kinds in sorted(self.counts.items()):
+            counts = ', '.join(f'{kind} {count}' for kind,count in kinds.items())
+            lines.append(f'{classname} {element}: {counts}')
+            lines.extend('    '+sample for sample in self.samples[classname, element])
+        return '\n'.join(lines)
+
+def _roundtrip(name: str) -> Optional[Tuple[str, str]]:
+    """
+    Checks name -> formula -> name and formula -> name -> formula starting from a name.
+    Returns None if it's stable, otherwise the kind of the mismatch and a description.
+    """
+    compound_type, compound, error = _recognize(name)
     try:
-        for compound in COMPOUNDS:
-            if compound.re_name.match(name):
-                return compound(name, True)
-            elif compound.re_sign.match(sign):
-                return compound(sign, False)
-    except NazvosloviException as e:
-        return e
+        if compound is None:
+            return 'recognize', f'{name}: {error or "nerozpoznáno"}'
+        name, sign = compound.name, compound.sign
+        
+        back_type, back, error = _recognize(sign)
+        if back is None:
+            return 'sign', f'{name} -> {sign}: {error or "nerozpoznáno"}'
+        if back_type is not compound_type:
+            return 'type', f'{name} -> {sign}: {back_type.typename}'
+        back_name = back.name
+        if back_name != name:
+            return 'name', f'{name} -> {sign} -> {back_name}'
+        
+        again_type, again, error = _recognize(back_name)
+        if again is None:
+            return 'formula', f'{sign} -> {back_name}: {error or "nerozpoznáno"}'
+        if again.sign != sign:
+            return 'formula', f'{sign} -> {back_name} -> {again.sign}'
     except Exception as e:
-        print('Sloučenina rozpoznána, ale je chybná:',e)
+        return 'recognize', f'{name}: {e!r}'
+    return None
+
+def _verify_unit(compound: Type[BaseCompound], element: str, partners: Optional[Tuple[str, ...]], every_prefix: bool, samples: int) -> tuple:
+    """
+    Verifies every name of a class made with an element, in a worker process.
+    Salts are made with the element as the acid and `partners` as the other element and the other way around,
+    with every element as the other one if `partners` is None.
+    Returns the class name, the element, the number of names, the counts of mismatches and their samples.
+    """
+    namings = _namings([element])
+    if compound in (Oxid, Sulfid, Acid):
+        names = _class_names(compound, namings, [])
+    elif partners is None:
+        names = _class_names(compound, namings, _namings(table), every_prefix)
     else:
-        return None
+        others = _namings([sign for sign in partners if sign != element])
+        names = chain(
+            _class_names(compound, namings, _namings(partners), every_prefix),
+            _class_names(compound, others, namings, every_prefix),
+        )
+    
+    checked = 0
+    counts = {}
+    found = []
+    for name in names:
+        checked += 1
+        mismatch = _roundtrip(name)
+        if mismatch is not None:
+            kind, description = mismatch
+            counts[kind] = counts.get(kind, 0)+1
+            if counts[kind] <= samples:
+                found.append(f'{kind}: {description}')
+    return compound.__name__, element, checked, counts, found
+
+def verify_roundtrips(
+    classes: Iterable[Type[BaseCompound]]=None,
+    elements: Iterable[str]=None,
+    jobs: int=None,
+    *,
+    partners: Optional[Iterable[str]]=VERIFY_PARTNERS,
+    every_prefix: bool=False,
+    samples: int=3
+) -> VerifyReport:
+    """
+    Recognizes every name the classes can create from the tables and checks that
+    name -> formula -> name and formula -> name -> formula give the same compound.
+    Defaults to the classes `enumerate_names` knows and every element.
+    
+    Every class and element is checked in one of `jobs` processes, all cores by default, inline with 1.
+    Salts combine two elements, so every element is only paired with `partners` in both roles
+    and the hydrogen and hydrate prefixes take turns, pass `partners=None` and `every_prefix=True` to check all of them.
+    """
+    classes = [compound for compound in (Oxid, Sulfid, Acid, Salt, HydrogenSalt, SaltHydrate) if classes is None or compound in classes]
+    elements = list(table if elements is None else elements)
+    partners = None if partners is None else tuple(partners)
+    units = [(compound, element, partners, every_prefix, samples) for compound in classes for element in elements]
+    
+    report = VerifyReport()
+    start = time.perf_counter()
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        for unit in units:
+            report.add(*_verify_unit(*unit))
+    else:
+        # imported here since it's slow to import and only needed for batches
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        with ProcessPoolExecutor(jobs, initializer=_init_worker) as executor:
+            futures = [executor.submit(_verify_unit, *unit) for unit in units]
+            for future in as_completed(futures):
+                report.add(*future.result())
+    report.seconds = time.perf_counter()-start
+    return report
 
 def pprint(compound: BaseCompound, entry: str='neznámé') -> str:
     return pstring.format(**compound.todict(entry=entry))
+
+def _json_renderer():
+    """
+    Returns a function that renders `Recognition.todict` as a line of JSON, the same as `json.dumps` with `ensure_ascii=False`.
+    json is imported here, since only writing results needs it.
+    """
+    from json.encoder import encode_basestring
+    # the line of a recognized compound, its fields in the order of `BaseCompound.todict`
+    compound_line = '{{' + ''.join(f'{encode_basestring(field)}: {{}}, ' for field in (*COMPOUND_FIELDS, 'entry')) + '"status": "ok"}}\n'
+    
+    def render(result: Recognition) -> str:
+        if result.error is None:
+            try:
+                compound = result.compound
+                return compound_line.format(*map(encode_basestring, (compound.typename, *compound.render(), result.entry)))
+            except Exception as e:
+                error, status = e, 'error'
+        else:
+            error, status = result.error, result.status
+        typename = encode_basestring(result.type.typename) if result.type else 'null'
+        if isinstance(error, Rejection):
+            position = 'null' if error.position is None else error.position
+            return (
+                f'{{"entry": {encode_basestring(result.entry)}, "status": "{status}", '
+                f'"typename": {typename}, "error": {encode_basestring(str(error))}, '
+                f'"code": "{error.code}", "position": {position}}}\n'
+            )
+        return (
+            f'{{"entry": {encode_basestring(result.entry)}, "status": "{status}", '
+            f'"typename": {typename}, "error": {encode_basestring(str(error))}}}\n'
+        )
+    return render
+
+def _text_block(result: Recognition) -> str:
+    """Returns a result formatted like `pprint`, errors are written instead of the compound."""
+    if result.error is None:
+        try:
+            name, sign, oxisign = result.compound.render()
+            return pstring.format(entry=result.entry, typename=result.compound.typename, name=name, sign=sign, oxisign=oxisign)+'\n\n'
+        except Exception as e:
+            return f'-- {result.entry}\n{e}\n\n'
+    return f'-- {result.entry}\n{result.error}\n\n'
+
+def write_results(results: Iterable[Recognition], file, format: str='json', flush: bool=False) -> int:
+    """
+    Writes results into a text file, without creating a dict for each of them.
+    `format` is either "json" for a JSON object per line, same as `Recognition.todict`,
+    or "text" for the same text as `pprint`.
+    Each result is written as soon as it's recognized, with `flush` the file is also flushed after it,
+    so a reader waiting for an answer doesn't wait for the next entries. Returns the number of results written.
+    """
+    if format == 'json':
+        render = _json_renderer()
+    elif format == 'text':
+        render = _text_block
+    else:
+        raise ValueError(f'Neznámý formát "{format}".')
+    
+    written = 0
+    for result in results:
+        file.write(render(result))
+        if flush:
+            file.flush()
+        written += 1
+    return written
+
+EXPORT_FIELDS = ('entry', 'status', *COMPOUND_FIELDS, 'error')
+EXPORT_FORMATS = ('csv', 'columns')
+COMPRESSIONS = {'gzip': '.gz', 'bz2': '.bz2', 'xz': '.xz'}
+
+def _export_row(result: Recognition) -> tuple:
+    """Returns a result as a row of `EXPORT_FIELDS`, empty fields are None."""
+    if result.error is None:
+        try:
+            return (result.entry, 'ok', result.compound.typename, *result.compound.render(), None)
+        except Exception as e:
+            error, status = e, 'error'
+    else:
+        error, status = result.error, result.status
+    return (result.entry, status, result.type.typename if result.type else None, None, None, None, str(error))
+
+def _open_export(path: str, compression: Optional[str]):
+    """Opens a text file for exporting, compressed with gzip, bz2 or xz."""
+    if compression is None:
+        return open(path, 'w', encoding='utf-8', newline='')
+    elif compression == 'gzip':
+        import gzip
+        return gzip.open(path, 'wt', encoding='utf-8', newline='')
+    elif compression == 'bz2':
+        import bz2
+        return bz2.open(path, 'wt', encoding='utf-8', newline='')
+    elif compression == 'xz':
+        import lzma
+        return lzma.open(path, 'wt', encoding='utf-8', newline='')
+    raise ValueError(f'Neznámá komprese "{compression}".')
+
+def export_results(results: Iterable[Recognition], path: str, format: str='csv', compression: str=None, chunksize: int=10000) -> int:
+    """
+    Exports results into a file with the columns `EXPORT_FIELDS`, returns the number of results.
+    
+    "csv" writes a header and a row for each result, empty fields are empty.
+    "columns" writes a JSON object per chunk of `chunksize` results: `{"rows": n, column: [values]}`.
+    `compression` is "gzip", "bz2" or "xz".
+    
+    Only a single chunk is kept in memory, so any amount of results can be exported.
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f'Neznámý formát "{format}".')
+    
+    exported = 0
+    results = iter(results)
+    with _open_export(path, compression) as file:
+        if format == 'csv':
+            import csv
+            writer = csv.writer(file)
+            writer.writerow(EXPORT_FIELDS)
+        else:
+            import json
+        while True:
+            rows = [_export_row(result) for result in islice(results, chunksize)]
+            if not rows:
+                return exported
+            exported += len(rows)
+            if format == 'csv':
+                writer.writerows(rows)
+            else:
+                columns = {'rows': len(rows)}
+                columns.update(zip(EXPORT_FIELDS, map(list, zip(*rows))))
+                file.write(json.dumps(columns, ensure_ascii=False)+'\n')
+
@@ -0,0 +1,162 @@
+"""
+A persistent cache of recognized compounds, shared by every process using the same directory.
+
+Results are stored in sqlite as the JSON of `Recognition.todict()`, keyed by the stripped entry
+and a fingerprint of `nazvoslovi.py` and `tables/*.csv`, so changing either of them invalidates the cache.
+The least recently used results are evicted once there are more than `maxsize` of them.
+
+This module doesn't import `nazvoslovi`, so a cached result is returned without loading the tables.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+import zlib
+# typing takes longer to import than a cache hit
+from collections.abc import Iterable
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CACHE_VERSION = 1
+CACHE_ENV = 'NAZVOSLOVI_CACHE'
+CACHE_FILENAME = 'results.sqlite'
+
+def default_directory() -> str:
+    """Returns the directory from `NAZVOSLOVI_CACHE`, or `nazvoslovi` in the user's cache directory."""
+    directory = os.environ.get(CACHE_ENV)
+    if directory:
+        return directory
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'nazvoslovi')
+
+def fingerprint(root: str=HERE) -> str:
+    """
+    Returns a checksum of the code and the csv tables.
+    crc32 is enough to notice a change and zlib imports much faster than hashlib.
+    """
+    checksum = zlib.crc32(str(CACHE_VERSION).encode())
+    size = 0
+    tables = os.path.join(root, 'tables')
+    paths = [os.path.join(root, 'nazvoslovi.py')]
+    paths += [os.path.join(tables, filename) for filename in sorted(os.listdir(tables)) if filename.endswith('.csv')]
+    for path in paths:
+        with open(path, 'rb') as file:
+            data = os.path.basename(path).encode()+b'\0'+file.read()
+        checksum = zlib.crc32(data, checksum)
+        size += len(data)
+    return f'{checksum:08x}-{size}'
+
+class ResultCache:
+    """
+    A size bounded LRU cache of results in an sqlite database.
+
+    Many processes can use the same database, writes wait at most `timeout` seconds for each other.
+    Results are only marked as used if they weren't used in the last `touch` seconds, so most hits don't write.
+    Opening the cache raises `OSError` or `sqlite3.Error` if the directory or the database can't be used,
+    after that it never raises database errors, they're counted in `errors` and treated as misses.
+    A cache shouldn't be shared between threads.
+    """
+    def __init__(self, directory: str=None, maxsize: int=100000, timeout: float=5.0, touch: int=60):
+        self.directory = directory or default_directory()
+        self.path = os.path.join(self.directory, CACHE_FILENAME)
+        self.maxsize = maxsize
+        self.touch = touch
+        self.version = fingerprint()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        # autocommit, writes start their own transactions
+        self._connection = sqlite3.connect(self.path, timeout=timeout, isolation_level=None)
+        try:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                'version TEXT NOT NULL, entry TEXT NOT NULL, payload TEXT NOT NULL, used INTEGER NOT NULL, '
+                'PRIMARY KEY (version, entry))'
+            )
+            self._connection.execute('CREATE INDEX IF NOT EXISTS results_used ON results (used)')
+        except sqlite3.Error:
+            self._connection.close()
+            raise
+
+    def __repr__(self):
+        return f'ResultCache<{self.path} hits={self.hits} misses={self.misses} errors={self.errors}>'
+
+    def __len__(self):
+        """The number of results of the current version."""
+        try:
+            return self._connection.execute('SELECT count(*) FROM results WHERE version = ?', (self.version,)).fetchone()[0]
+        except sqlite3.Error:
+            self.errors += 1
+            return 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, entry: str) -> str | None:
+        """Returns the JSON of a cached result or None."""
+        entry = entry.strip()
+        try:
+            row = self._connection.execute(
+                'SELECT payload, used FROM results WHERE version = ? AND entry = ?', (self.version, entry)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            payload, used = row
+            self.hits += 1
+            now = int(time.time())
+            if now - used >= self.touch:
+                self._connection.execute(
+                    'UPDATE results SET used = ? WHERE version = ? AND entry = ?', (now, self.version, entry)
+                )
+            return payload
+        except sqlite3.Error:
+            self.errors += 1
+            return None
+
+    def put(self, entry: str, payload: str):
+        """Saves the JSON of a result."""
+        self.put_many([(entry, payload)])
+
+    def put_many(self, items: Iterable[tuple[str, str]]):
+        """Saves `(entry, payload)` pairs in a single transaction, then evicts the oldest results if it's full."""
+        now = int(time.time())
+        rows = [(self.version, entry.strip(), payload, now) for entry,payload in items]
+        try:
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                self._connection.executemany('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)', rows)
+                self._evict()
+            except BaseException:
+                self._connection.execute('ROLLBACK')
+                raise
+            self._connection.execute('COMMIT')
+        except sqlite3.Error:
+            self.errors += 1
+
+    def _evict(self):
+        """Removes the least recently used results, results of other versions count too."""
+        count = self._connection.execute('SELECT count(*) FROM results').fetchone()[0]
+        if count <= self.maxsize:
+            return
+        # remove a bit more so it doesn't have to happen on every write
+        excess = count - self.maxsize + self.maxsize//10
+        self._connection.execute(
+            'DELETE FROM results WHERE rowid IN (SELECT rowid FROM results ORDER BY used LIMIT ?)', (excess,)
+        )
+
+    def clear(self):
+        """Removes every result."""
+        try:
+            self._connection.execute('DELETE FROM results')
+        except sqlite3.Error:
+            self.errors += 1
+
+    def close(self):
+        self._connection.close()
@@ -0,0 +1,278 @@
+"""
+A local HTTP server which keeps the tables loaded, so other programs don't have to start `main.py` for every compound.
+
+    POST /recognize   {"entry": "Li2O"} or {"entries": ["Li2O", "oxid sodný"]}
+    GET  /health
+
+Every entry is answered with `Recognition.todict()`.
+Entries of concurrent requests are recognized together in small batches.
+"""
+import asyncio
+import json
+import sys
+import time
+from typing import List, Optional, Tuple
+
+from nazvoslovi import recognize_many
+
+REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    431: 'Request Header Fields Too Large',
+    503: 'Service Unavailable',
+}
+
+class HTTPError(Exception):
+    """An error which is sent to the client as a JSON response."""
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+class Server:
+    """
+    Recognizes compounds sent over HTTP.
+
+    Entries are queued and recognized in batches of at most `max_batch` entries,
+    a batch waits at most `batch_delay` seconds for more entries.
+    Requests are refused with 503 while `max_pending` entries are waiting,
+    and with 413 if they have more than `max_entries` entries or `max_body` bytes.
+    Requests with more than `max_headers` headers, or a header longer than the stream limit, are refused with 431.
+    """
+    def __init__(
+        self,
+        max_batch: int=64,
+        batch_delay: float=0.002,
+        max_pending: int=10000,
+        max_entries: int=1000,
+        max_body: int=1<<20,
+        max_headers: int=100
+    ):
+        self.max_batch = max_batch
+        self.batch_delay = batch_delay
+        self.max_pending = max_pending
+        self.max_entries = max_entries
+        self.max_body = max_body
+        self.max_headers = max_headers
+
+        self.pending = 0
+        self.served = 0
+        self.batches = 0
+        self.refused = 0
+        self.started = time.time()
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+
+    def __repr__(self):
+        return f'Server<{self.pending} pending, {self.served} served in {self.batches} batches>'
+
+    def health(self) -> dict:
+        """Returns the status of the server."""
+        return {
+            'status': 'ok',
+            'pending': self.pending,
+            'served': self.served,
+            'batches': self.batches,
+            'refused': self.refused,
+            'uptime': round(time.time()-self.started, 3),
+        }
+
+    async def recognize(self, entries: List[str]) -> List[dict]:
+        """Queues entries and waits for their results."""
+        if self.pending + len(entries) > self.max_pending:
+            self.refused += 1
+            raise HTTPError(503, 'Server je přetížený, zkuste to znovu později.')
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        for entry in entries:
+            future = loop.create_future()
+            self._queue.put_nowait((entry, future))
+            futures.append(future)
+        self.pending += len(entries)
+        return await asyncio.gather(*futures)
+
+    async def _batch_loop(self):
+        """Takes entries from the queue and recognizes them in batches."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_delay
+            while len(batch) < self.max_batch:
+                if self._queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self._queue.get_nowait())
+
+            try:
+                results = [result.todict() for result in recognize_many(entry for entry,future in batch)]
+            except Exception as e:
+                results = [{'entry': entry, 'status': 'error', 'typename': None, 'error': str(e)} for entry,future in batch]
+            for (entry, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+            self.pending -= len(batch)
+            self.served += len(batch)
+            self.batches += 1
+
+    def _parse_entries(self, body: bytes) -> Tuple[List[str], bool]:
+        """Returns the entries in a request body and whether it was a single entry."""
+        try:
+            data = json.loads(body)
+        except (ValueError, UnicodeDecodeError):
+            raise HTTPError(400, 'Tělo požadavku není platný JSON.')
+
+        if isinstance(data, dict):
+            if 'entry' in data:
+                data = data['entry']
+            elif 'entries' in data:
+                data = data['entries']
+        single = isinstance(data, str)
+        entries = [data] if single else data
+        if not isinstance(entries, list) or not all(isinstance(entry, str) for entry in entries):
+            raise HTTPError(400, 'Očekáván "entry" s textem nebo "entries" se seznamem textů.')
+        if len(entries) > self.max_entries:
+            raise HTTPError(413, f'Najednou lze poslat nejvýše {self.max_entries} sloučenin.')
+        return entries, single
+
+    async def handle(self, method: str, path: str, body: bytes) -> object:
+        """Handles a single request and returns the JSON response."""
+        path = path.split('?')[0]
+        if path == '/health':
+            if method != 'GET':
+                raise HTTPError(405, 'Použijte GET.')
+            return self.health()
+        if path == '/recognize':
+            if method != 'POST':
+                raise HTTPError(405, 'Použijte POST.')
+            entries, single = self._parse_entries(body)
+            results = await self.recognize(entries)
+            return results[0] if single else results
+        raise HTTPError(404, f'Neznámá cesta "{path}".')
+
+    @staticmethod
+    async def _read_line(reader: asyncio.StreamReader, status: int, message: str) -> bytes:
+        """Reads a line, a line longer than the stream limit is refused with `status`."""
+        try:
+            return await reader.readline()
+        except (ValueError, asyncio.LimitOverrunError):
+            raise HTTPError(status, message)
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, dict, bytes]]:
+        """Reads a request, returns None if the connection was closed."""
+        line = await self._read_line(reader, 400, 'Řádek požadavku je příliš dlouhý.')
+        if not line:
+            return None
+        try:
+            method, path, version = line.decode('latin-1').split()
+        except ValueError:
+            raise HTTPError(400, 'Neplatný požadavek.')
+
+        headers = {}
+        count = 0
+        while True:
+            line = await self._read_line(reader, 431, 'Hlavička požadavku je příliš dlouhá.')
+            if line in (b'\r\n', b'\n', b''):
+                break
+            count += 1
+            if count > self.max_headers:
+                raise HTTPError(431, f'Požadavek může mít nejvýše {self.max_headers} hlaviček.')
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        # only digits, int() would also take a sign, spaces and underscores
+        length = headers.get('content-length', '0')
+        if not (length.isascii() and length.isdigit()):
+            raise HTTPError(400, 'Neplatná hlavička Content-Length.')
+        length = int(length)
+        if length > self.max_body:
+            raise HTTPError(413, f'Tělo požadavku může mít nejvýše {self.max_body} bajtů.')
+        body = await reader.readexactly(length) if length else b''
+
+        headers[':version'] = version
+        return method, path, headers, body
+
+    async def _connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answers requests of a connection until it's closed."""
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    connection = headers.get('connection', '').lower()
+                    keep_alive = connection == 'keep-alive' or (headers[':version'] == 'HTTP/1.1' and connection != 'close')
+                    status, response = 200, await self.handle(method, path, body)
+                except HTTPError as e:
+                    status, response = e.status, {'error': str(e)}
+
+                data = json.dumps(response, ensure_ascii=False).encode('utf-8')
+                head = (
+                    f'HTTP/1.1 {status} {REASONS[status]}\r\n'
+                    f'Content-Type: application/json; charset=utf-8\r\n'
+                    f'Content-Length: {len(data)}\r\n'
+                    f'Connection: {"keep-alive" if keep_alive else "close"}\r\n'
+                    + ('Retry-After: 1\r\n' if status == 503 else '')
+                    + '\r\n'
+                )
+                writer.write(head.encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str='127.0.0.1', port: int=8080) -> asyncio.AbstractServer:
+        """Starts listening and batching, returns the asyncio server."""
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._batch_loop())
+        return await asyncio.start_server(self._connection, host, port)
+
+    async def stop(self):
+        """Stops batching, entries still in the queue are not answered."""
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+            self._batcher = None
+
+async def serve(host: str='127.0.0.1', port: int=8080, **options):
+    """Runs a `Server` until it's cancelled."""
+    server = Server(**options)
+    listener = await server.start(host, port)
+    print(f'server běží na http://{host}:{port}', file=sys.stderr)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        await server.stop()
+
+def main(args: List[str]):
+    host, port = '127.0.0.1', 8080
+    if args:
+        host, _, port = args[0].rpartition(':')
+        if not port.isdigit():
+            quit(print('použití: python main.py serve [<adresa>:<port>]'))
+        host, port = host or '127.0.0.1', int(port)
+    try:
+        asyncio.run(serve(host, port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -46,3 +46,167 @@ for test in tests.strip().split('\n'):
             print(compound)
         else:
             print(f'{compound.oxisign} {compound.name} <{compound.typename}>')
+
+# vlákna
+from concurrent.futures import ThreadPoolExecutor
+import sys
+sys.setswitchinterval(1e-6) # switch threads as often as possible
+
+def describe(entry):
+    compound = recognize(entry)
+    return compound.oxisign+' '+compound.name
+
+entries = [test for test in tests.strip().split('\n') if test and not test.startswith('#')]+['uhličitan vápenatý','CaCO3']
+expected = [describe(entry) for entry in entries]
+for cache in (False, True):
+    if cache:
+        enable_cache(8)
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(describe, entries*200))
+    disable_cache()
+    print(f'vlákna{" s cache" if cache else ""}:', 'OK' if results == expected*200 else 'CHYBA')
+
+# generátor
+generated = list(CompoundGenerator(1).compounds(2000))
+print('generátor:', 'OK' if not any('₀' in compound.sign for compound in generated) else 'CHYBA')
+print('generátor tam a zpět:', 'OK' if all(
+    recognize(compound.sign).name == compound.name and recognize(compound.name).sign == compound.sign for compound in generated
+) else 'CHYBA')
+generator = CompoundGenerator(1, elements=['H', 'Na', 'S'])
+size = len(generator)
+generated = list(generator.compounds())
+print('generátor bez vodíku v solích:', 'OK' if generated and len(generator) == size and not any(
+    isinstance(compound, (Salt, HydrogenSalt, SaltHydrate)) and compound.name.endswith(('vodný', 'vodného')) for compound in generated
+) else 'CHYBA')
+
+# přidaný typ s regexem bez rozlišení velikosti písmen
+class Selenid(SingleElementCompound):
+    typename = 'selenid'
+    re_sign = re.compile(r"^(?P<alt>[A-Z][a-z]?\d{0,2}) ?(?P<main>Se\d{0,2})$")
+    re_name = re.compile(r"^selenid (?P<alt>[^ 0-9]*)$", re.IGNORECASE)
+    name_keys = frozenset({'selenid'})
+    spaced_name = True
+    main_sign = 'Se'
+    main_name = 'selenid'
+    main_oxidation = -2
+
+COMPOUNDS.register(Selenid)
+for test in ('selenid sodný', 'SELENID sodný', 'Na2Se'):
+    compound = recognize(test)
+    print(f'{compound.oxisign} {compound.name} <{compound.typename}>' if isinstance(compound, Selenid) else f'{test}: CHYBA')
+COMPOUNDS.unregister(Selenid)
+try:
+    COMPOUNDS.register(type('Cislovany', (Selenid,), {'re_name': re.compile(r"^(selenid) \1 (?P<alt>\w*)$")}))
+    print('číslovaná skupina: CHYBA')
+except ValueError as e:
+    print(e)
+
+# nulové počty
+for test in ('Li0O', 'NaO0', 'Al2(SO4)₀', 'Na2SO4.0H2O', 'Na2SO4.10H2O'):
+    result = next(recognize_many([test]))
+    print(test, result.error.code if result.error else result.status, result.error or result.compound.sign)
+
+# závorka bez počtu a oxidační číslo mimo tabulku
+results = [next(recognize_many([test])).todict() for test in ('N(HHfO9)', 'Na(SO4)', 'N(HHfO9)2')]
+print('závorka bez počtu:', 'OK' if [result['status'] for result in results] == ['unknown', 'unknown', 'error']
+    and results[2]['error'] == 'Prvek Hf nemůže mít oxidační číslo 16.' else 'CHYBA')
+
+# write_results píše stejný JSON jako todict
+import io, json
+entries += ['Li0O', 'Xx2O', 'NaCl', 'kyselina rhodistá', '']
+output = io.StringIO()
+write_results(recognize_many(entries), output)
+expected = ''.join(json.dumps(result.todict(), ensure_ascii=False)+'\n' for result in recognize_many(entries))
+print('write_results:', 'OK' if output.getvalue() == expected else 'CHYBA')
+
+# binární tabulka prvků
+import os, tempfile
+with tempfile.TemporaryDirectory() as directory:
+    binary = BinaryTable(build_binary_table(os.path.join(directory, 'table.bin')))
+    matched = binary.match_naming('sodný')
+    print('binární tabulka:', 'OK' if all(dict(binary[sign]) == dict(table[sign]) for sign in table)
+        and matched[0]['sign'] == 'Na' and matched[1:] == ('sod', 'ný') and binary.match_naming('xyz') is None else 'CHYBA')
+
+# uložený index se zahodí po změně kódu
+import pickle
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, 'index.pickle')
+    CompoundIndex.build(elements=['Na', 'S']).save(path)
+    loaded = CompoundIndex.load(path)
+    with open(path, 'rb') as file:
+        saved = pickle.load(file)
+    saved['code'] = 'jiný kód'
+    with open(path, 'wb') as file:
+        pickle.dump(saved, file)
+    print('uložený index:', 'OK' if loaded is not None and len(loaded) > 0 and CompoundIndex.load(path) is None else 'CHYBA')
+
+# chybové odpovědi serveru
+import asyncio
+from server import Server
+
+async def ask_server(requests):
+    server = Server(max_headers=10)
+    listener = await server.start('127.0.0.1', 0)
+    port = listener.sockets[0].getsockname()[1]
+    statuses = []
+    try:
+        for request in requests:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(request)
+            statuses.append(int((await reader.readline()).split()[1]))
+            writer.close()
+    finally:
+        listener.close()
+        await server.stop()
+    return statuses
+
+body = b'{"entry": "Li2O"}'
+requests = [
+    (200, b'POST /recognize HTTP/1.1\r\nContent-Length: %d\r\n\r\n' % len(body) + body),
+    (400, b'POST /recognize HTTP/1.1\r\nContent-Length: x\r\n\r\n'),
+    (404, b'GET /nic HTTP/1.1\r\n\r\n'),
+    (431, b'GET / HTTP/1.1\r\nX-Big: ' + b'a'*70000 + b'\r\n\r\n'),
+    (431, b'GET / HTTP/1.1\r\n' + b'X-Header: 1\r\n'*11 + b'\r\n'),
+]
+statuses = asyncio.run(ask_server([request for _,request in requests]))
+print('chyby serveru:', 'OK' if statuses == [status for status,_ in requests] else f'CHYBA {statuses}')
+
+# paralelní a skupinové rozpoznání dává to samé jako recognize_many
+expected = [result.todict() for result in recognize_many(entries)]
+parallel = [result.todict() for result in recognize_parallel(entries, 2, chunksize=7)]
+print('recognize_parallel:', 'OK' if parallel == expected else 'CHYBA')
+print('recognize_bulk:', 'OK' if [result.todict() for result in recognize_bulk(entries)] == expected else 'CHYBA')
+
+# export výsledků do csv a JSON sloupců
+import csv, gzip
+rows = [tuple(result.get(field) for field in EXPORT_FIELDS) for result in expected]
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, 'export.csv.gz')
+    count = export_results(recognize_many(entries), path, 'csv', 'gzip')
+    with gzip.open(path, 'rt', encoding='utf-8', newline='') as file:
+        exported = [tuple(row) for row in csv.reader(file)]
+    csv_ok = count == len(entries) and exported == [EXPORT_FIELDS, *(tuple('' if value is None else value for value in row) for row in rows)]
+    path = os.path.join(directory, 'export.json')
+    export_results(recognize_many(entries), path, 'columns', chunksize=7)
+    with open(path, encoding='utf-8') as file:
+        chunks = [json.loads(line) for line in file]
+    exported = [row for chunk in chunks for row in zip(*(chunk[field] for field in EXPORT_FIELDS))]
+    columns_ok = [chunk['rows'] for chunk in chunks][:-1] == [7]*(len(chunks)-1) and exported == rows
+print('export_results:', 'OK' if csv_ok and columns_ok else 'CHYBA')
+
+# sqlite cache výsledků
+from resultcache import ResultCache
+with tempfile.TemporaryDirectory() as directory:
+    with ResultCache(directory, maxsize=10) as cache:
+        cache.put(' Li2O\n', '{"entry": "Li2O"}')
+        stored = cache.get('Li2O') == '{"entry": "Li2O"}' and cache.get('Na2O') is None
+        cache.put_many((f'entry {i}', '{}') for i in range(20))
+        evicted = len(cache) <= 10
+    with ResultCache(directory) as cache:
+        cache.put('Li2O', '{}')
+        version, cache.version = cache.version, 'jiný kód'
+        invalidated = cache.get('Li2O') is None and len(cache) == 0
+        cache.version = version
+        cache.clear()
+        cleared = len(cache) == 0 and cache.get('Li2O') is None and cache.errors == 0
+print('sqlite cache:', 'OK' if stored and evicted and invalidated and cleared else 'CHYBA')